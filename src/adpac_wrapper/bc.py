@@ -1,7 +1,29 @@
+from cStringIO import StringIO
+
 from openmdao.main.api import Container
 from openmdao.lib.datatypes.api import Int, Str
 
-from adpac_wrapper.boundata import register
+from adpac_wrapper.boundata import HEADER_FIELDS, format_header, register
+
+# (attribute, legal values, message) for letter fields, checked by
+# BC.check_config() and, for all BCs at once, Boundata.config_errors().
+LETTER_CHECKS = (
+    ('lface1', ('I', 'J', 'K'), 'must be I, J, or K.'),
+    ('lface2', ('I', 'J', 'K'), 'must be I, J, or K.'),
+    ('ldir1', ('P', 'M'), 'must be P or M.'),
+    ('ldir2', ('P', 'M'), 'must be P or M.'),
+    ('lspec1', ('H', 'I', 'J', 'K', 'L', 'M', 'S'),
+     'must be H, I, J, K, L, M, or S.'),
+    ('lspec2', ('H', 'I', 'J', 'K', 'L', 'M', 'S'),
+     'must be H, I, J, K, L, M, or S.'),
+)
+
+# (attribute1, attribute2, strict) for limits where attribute1 must be
+# greater than (strict) or equal to attribute2.
+LIMIT_CHECKS = (
+    ('m1lim2', 'm1lim1', True),
+    ('n1lim2', 'n1lim1', False),
+)
 
 
 class BC(Container):
@@ -37,6 +59,13 @@ class BC(Container):
     def __init__(self, type_name, *args, **kwargs):
         super(BC, self).__init__(*args, **kwargs)
         self.type_name = type_name
+        self._text = None  # (key, text) last generated by format().
+
+    def _anytrait_changed(self, name, old, new):
+        """ Invalidate formatted text and parent's header table. """
+        self._text = None
+        if name in HEADER_FIELDS and self.parent is not None:
+            self.parent._table = None
 
     def read(self, tokens, inp, input_ref):
         """
@@ -68,37 +97,19 @@ class BC(Container):
     def check_config(self):
         """ Check sanity of current configuration. """
 #TODO: check indices against mesh dimensions, etc.
-        if self.lface1 not in ('I', 'J', 'K'):
-            self.raise_exception('lface1 (%s) must be I, J, or K.' \
-                                 % self.lface1, ValueError)
-
-        if self.lface2 not in ('I', 'J', 'K'):
-            self.raise_exception('lface2 (%s) must be I, J, or K.' \
-                                 % self.lface2, ValueError)
-
-        if self.ldir1 not in ('P', 'M'):
-            self.raise_exception('ldir1 (%s) must be P or M.' \
-                                 % self.ldir1, ValueError)
-
-        if self.ldir2 not in ('P', 'M'):
-            self.raise_exception('ldir2 (%s) must be P or M.' \
-                                 % self.ldir2, ValueError)
-
-        if self.lspec1 not in ('H', 'I', 'J', 'K', 'L', 'M', 'S'):
-            self.raise_exception('lspec1 (%s) must be H, I, J, K, L, M, or S.' \
-                                 % self.lspec1, ValueError)
-
-        if self.lspec2 not in ('H', 'I', 'J', 'K', 'L', 'M', 'S'):
-            self.raise_exception('lspec2 (%s) must be H, I, J, K, L, M, or S.' \
-                                 % self.lspec2, ValueError)
-
-        if self.m1lim2 <= self.m1lim1:
-            self.raise_exception('m1lim2 (%d) must be > m1lim1 (%d).' \
-                                 % (self.m1lim2, self.m1lim1), ValueError)
-
-        if self.n1lim2 < self.n1lim1:
-            self.raise_exception('n1lim2 (%d) must be >= n1lim1 (%d).' \
-                                 % (self.n1lim2, self.n1lim1), ValueError)
+        for attr, legal, msg in LETTER_CHECKS:
+            value = getattr(self, attr)
+            if value not in legal:
+                self.raise_exception('%s (%s) %s' % (attr, value, msg),
+                                     ValueError)
+
+        for attr1, attr2, strict in LIMIT_CHECKS:
+            value1 = getattr(self, attr1)
+            value2 = getattr(self, attr2)
+            if value1 < value2 or (strict and value1 == value2):
+                self.raise_exception('%s (%d) must be %s %s (%d).' \
+                                     % (attr1, value1, '>' if strict else '>=',
+                                        attr2, value2), ValueError)
 
     def size(self):
         """ Compute size of boundary (used by :meth:`boundata.schedule`). """
@@ -106,35 +117,37 @@ class BC(Container):
         n = abs(self.n1lim1 - self.n1lim2) + 1
         return m * n
 
+    def format(self, count, input_ref):
+        """
+        Return text for BC `count` as written by :meth:`write`.
+        The text is cached until this BC (or a child) is modified.
+        """
+        key = (count, input_ref.pref, input_ref.tref)
+        if self._text is None or self._text[0] != key:
+            out = StringIO()
+            self.write(out, count, input_ref)
+            self._text = (key, out.getvalue())
+        return self._text[1]
+
     def write(self, out, count, input_ref):
         """
         Write BC `count` to stream `out`.
         `input_ref` provides an :class:`Input` object for reference conditions.
         """
-        out.write('%-8s' % self.type_name)
-
-        out.write('%4d' % self.lblock1)
-        out.write('%4d' % self.lblock2)
-
-        out.write(' %s' % self.lface1)
-        out.write(' %s' % self.lface2)
-        out.write(' %s' % self.ldir1)
-        out.write(' %s' % self.ldir2)
-        out.write(' %s' % self.lspec1)
-        out.write(' %s' % self.lspec2)
-
-        out.write('%4d' % self.l1lim)
-        out.write('%4d' % self.l2lim)
-        out.write('%4d' % self.m1lim1)
-        out.write('%4d' % self.m1lim2)
-        out.write('%4d' % self.n1lim1)
-        out.write('%4d' % self.n1lim2)
-        out.write('%4d' % self.m2lim1)
-        out.write('%4d' % self.m2lim2)
-        out.write('%4d' % self.n2lim1)
-        out.write('%4d' % self.n2lim2)
-
-        out.write('  # BC %d\n' % count)
+        out.write(format_header(self, count))
+
+
+class BCData(Container):
+    """
+    Base class for data containers owned by a BC. Modifications invalidate
+    the owning BC's formatted text.
+    """
+
+    def _anytrait_changed(self, name, old, new):
+        """ Invalidate parent's formatted text. """
+        parent = self.parent
+        if parent is not None:
+            parent._text = None
 
 
 register('EXITP',  BC)
@@ -1,6 +1,6 @@
-from openmdao.main.api import Container
 from openmdao.lib.datatypes.api import Int, Str
 
+from adpac_wrapper.bc import BCData
 from adpac_wrapper.bcint1 import BCInt1
 from adpac_wrapper.boundata import register
 
@@ -111,7 +111,7 @@ class BCIntM(BCInt1):
 register('BCINTM', BCIntM)
 
 
-class BCIntM_send(Container):
+class BCIntM_send(BCData):
     """ :class:`BCIntM` sending block definition. """
 
     nbldat = Int(low=1, desc='Sending block.')
@@ -161,7 +161,7 @@ class BCIntM_send(Container):
                      self.m2lim1, self.m2lim2, self.n2lim1, self.n2lim2))
 
 
-class BCIntM_recv(Container):
+class BCIntM_recv(BCData):
     """ :class:`BCIntM` receiving block definition. """
 
     lblk1rr = Int(low=1, desc='Receiving block.')
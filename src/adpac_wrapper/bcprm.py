@@ -1,6 +1,6 @@
-from openmdao.main.api import Container
 from openmdao.lib.datatypes.api import Int, Str
 
+from adpac_wrapper.bc import BCData
 from adpac_wrapper.bcprr import BCPRR
 from adpac_wrapper.boundata import register
 
@@ -77,7 +77,7 @@ class BCPRM(BCPRR):
 register('BCPRM', BCPRM)
 
 
-class BCPRM_recv(Container):
+class BCPRM_recv(BCData):
     """ :class:`BCPRM` receiving block definition. """
 
     lblock1b = Int(low=1, desc='Receiving block.')
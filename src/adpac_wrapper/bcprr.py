@@ -1,7 +1,6 @@
-from openmdao.main.api import Container
 from openmdao.lib.datatypes.api import Float, Int, Str
 
-from adpac_wrapper.bc import BC
+from adpac_wrapper.bc import BC, BCData
 from adpac_wrapper.boundata import register
 
 
@@ -86,7 +85,7 @@ class BCPRR(BC):
 register('BCPRR', BCPRR)
 
 
-class BCPRR_send(Container):
+class BCPRR_send(BCData):
     """ :class:`BCPRR` sending block definition. """
 
     lblock2b = Int(low=1, desc='Sending block.')
@@ -1,242 +1,771 @@
-import fileinput
+import collections
 import sys
+from cStringIO import StringIO
+
+import numpy
 
 from openmdao.main.api import Container
 
+from adpac_wrapper.cache import decode_values, encode_values
 from adpac_wrapper.input import Input
+from adpac_wrapper.util import write_if_changed
 
 # Default input values used for (non-)dimensionalizing, etc.
-INPUT = Input()
+# Created on first use by default_input().
+_INPUT = None
+
+
+def default_input():
+    """ Return shared :class:`Input` with default values. """
+    global _INPUT
+    if _INPUT is None:
+        _INPUT = Input()
+    return _INPUT
+
+
+# Column header for ``<casename>.boundata``.
+_HEADER = """\
+# B        L   L L L L L L L   L   L   M   M   N   N   M   M   N   N
+# C        B   B F F D D S S   1   2   1   1   1   1   2   2   2   2
+# T        L   L A A I I P P   L   L   L   L   L   L   L   L   L   L
+# Y        O   O C C R R E E   I   I   I   I   I   I   I   I   I   I
+# P        C   C E E 1 2 C C   M   M   M   M   M   M   M   M   M   M
+# E        K   K 1 2     1 2           1   2   1   2   1   2   1   2
+#          1   2
+# ------ --- --- - - - - - - --- --- --- --- --- --- --- --- --- ---
+"""
+
+# Header line fields common to all BCs, following the BC type.
+HEADER_FIELDS = ('lblock1', 'lblock2', 'lface1', 'lface2', 'ldir1', 'ldir2',
+                 'lspec1', 'lspec2', 'l1lim', 'l2lim', 'm1lim1', 'm1lim2',
+                 'n1lim1', 'n1lim2', 'm2lim1', 'm2lim2', 'n2lim1', 'n2lim2')
+
+# Header line fields which are single letters.
+_LETTERS = ('lface1', 'lface2', 'ldir1', 'ldir2', 'lspec1', 'lspec2')
+
+# Row of Boundata.table(): BC type code followed by the header fields.
+# Letters are fixed-width strings so comparisons are vectorized.
+BC_DTYPE = numpy.dtype([('type', 'i2')] +
+                       [(attr, 'S1' if attr in _LETTERS else 'i4')
+                        for attr in HEADER_FIELDS])
+
+
+def format_header(obj, count):
+    """ Return header line for BC `obj` written as BC `count`. """
+    return '%-8s%4d%4d %s %s %s %s %s %s%4d%4d%4d%4d%4d%4d%4d%4d%4d%4d' \
+           '  # BC %d\n' % ((obj.type_name,) +
+                            tuple([getattr(obj, attr)
+                                   for attr in HEADER_FIELDS]) +
+                            (count,))
 
 
 # Map from BC type name to class.
 _REGISTRY = {}
 
+# Map from BC type name to module which registers its class when imported.
+# Modules are imported on first use of one of their BC types.
+_MODULES = {
+    'BCINT1': 'bcint1', 'BCINTM': 'bcintm', 'BCPRM': 'bcprm',
+    'BCPRR': 'bcprr', 'BDATIN': 'bdatin', 'BDATOU': 'bdatin',
+    'ENDTTA': 'endtta', 'EXITG': 'exitg', 'EXT2DG': 'exitg',
+    'EXITN': 'bc', 'EXITP': 'bc', 'EXITT': 'exitg', 'EXITX': 'exitg',
+    'EXT2DP': 'bc', 'EXT2DT': 'exitg', 'FIXED': 'fixed', 'FRE2D': 'free',
+    'FREE': 'free', 'INL2DA': 'inleta', 'INL2DG': 'inletg',
+    'INL2DM': 'inletm', 'INL2DR': 'inletr', 'INL2DT': 'inlett',
+    'INLETA': 'inleta', 'INLETG': 'inletg', 'INLETM': 'inletm',
+    'INLETN': 'bc', 'INLETR': 'inletr', 'INLETT': 'inlett',
+    'INLETX': 'inlett', 'KIL2D': 'kill', 'KILL': 'kill',
+    'LAM2DS': 'lamss', 'LAMSS': 'lamss', 'MBCAVG': 'mbcavg', 'NPSS': 'bc',
+    'PATCH': 'bc', 'PINT': 'bc', 'PROBE': 'bc', 'SS2DIN': 'bc',
+    'SS2DVI': 'ssvi', 'SSIN': 'bc', 'SSVI': 'ssvi', 'SYSTEM': 'system',
+    'TRAF': 'bc', 'VCE': 'vce',
+}
+
+# BC type names, indexed by type code (see type_code()).
+_TYPE_NAMES = sorted(_MODULES)
+
+# Map from BC type name to type code.
+_TYPE_CODES = dict([(name, i) for i, name in enumerate(_TYPE_NAMES)])
+
+
+def type_code(name):
+    """ Return type code for BC type `name` in :meth:`Boundata.table`. """
+    try:
+        return _TYPE_CODES[name]
+    except KeyError:
+        _TYPE_CODES[name] = len(_TYPE_NAMES)
+        _TYPE_NAMES.append(name)
+        return _TYPE_CODES[name]
+
+
 def register(name, cls):
     """ Register `cls` as handler for `name`. """
     _REGISTRY[name] = cls
+    type_code(name)
+
+
+def lookup(name):
+    """
+    Return class registered as handler for `name` (importing its module
+    if necessary), or None.
+    """
+    try:
+        return _REGISTRY[name]
+    except KeyError:
+        if name in _MODULES:
+            __import__('adpac_wrapper.'+_MODULES[name])
+        return _REGISTRY.get(name)
+
+
+# Maps (BC class, method name) to whether the class overrides BC's method.
+_OVERRIDES = {}
+
+def _overrides(cls, name):
+    """ Return True if BC class `cls` overrides method `name` of BC. """
+    try:
+        return _OVERRIDES[(cls, name)]
+    except KeyError:
+        from adpac_wrapper.bc import BC
+        override = False
+        for klass in cls.__mro__:
+            if klass is BC:
+                break
+            if name in vars(klass):
+                override = True
+                break
+        _OVERRIDES[(cls, name)] = override
+        return override
+
+
+def _has_specific_checks(cls):
+    """ Return True if BC class `cls` has additional configuration checks. """
+    return _overrides(cls, 'check_config')
+
+
+def _is_bc_type(name):
+    """ Return True if `name` (upper case) is a BC type. """
+    return name in _REGISTRY or name in _MODULES
+
+
+def _header_error(tokens):
+    """
+    Return reason `tokens` (of an upper case line) are not a BC header,
+    or None. Data lines may start with a BC type name (e.g. a filename or
+    command), but not with a complete header.
+    """
+    if len(tokens) < 19:
+        return 'expecting 19 fields, got %d.' % len(tokens)
+    for attr, token in zip(HEADER_FIELDS, tokens[1:]):
+        if attr in _LETTERS:
+            if len(token) != 1:
+                return '%s (%s) must be a single letter.' % (attr, token)
+        else:
+            try:
+                int(token)
+            except ValueError:
+                return '%s (%s) must be an integer.' % (attr, token)
+    return None
+
+
+def _is_blank(line):
+    """ Return True if `line` is blank or a comment. """
+    stripped = line.lstrip()
+    return not stripped or stripped[0] == '#'
+
+
+class BCRecord(object):
+    """
+    Lightweight record of a parsed BC. Header fields are parsed, while any
+    BC-specific data lines are checked when read and kept as text, both as
+    read (`body`) and as written by the BC class (`text`). A record is
+    replaced by a full BC (of class `cls`) when accessed as an attribute of
+    its :class:`Boundata`, otherwise it is written using `text`, so output
+    does not depend on whether a BC has been accessed.
+    `context` is the ``(pref, tref)`` the data lines are relative to.
+    Header fields should be modified via the promoted BC, so that
+    :meth:`Boundata.table` is updated.
+    """
+
+    __slots__ = ('cls', 'type_name', 'name', 'line', 'body', 'text',
+                 'context') + HEADER_FIELDS
+
+    def __init__(self, cls, type_name, name, line, context):
+        self.cls = cls
+        self.type_name = type_name
+        self.name = name
+        self.line = line  # (lineno, text) of header line.
+        self.body = []    # (lineno, text) for each data line.
+        self.text = ''    # Data lines as written.
+        self.context = context
+
+    def __getstate__(self):
+        return dict([(name, getattr(self, name)) for name in self.__slots__])
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    def size(self):
+        """ Compute size of boundary (used by :meth:`boundata.schedule`). """
+        m = abs(self.m1lim1 - self.m1lim2) + 1
+        n = abs(self.n1lim1 - self.n1lim2) + 1
+        return m * n
+
+    def format(self, count, input_ref=None):
+        """ Return text for BC `count` as written by :meth:`write`. """
+        if not self.text:
+            return format_header(self, count)
+        return '\n' + format_header(self, count) + self.text
+
+    def write(self, out, count, input_ref=None):
+        """ Write BC `count` to stream `out`. """
+        out.write(self.format(count, input_ref))
+
+
+class _RecordLines(object):
+    """ Stream of a record's data lines, as read by :meth:`BC.read`. """
+
+    def __init__(self, record):
+        self._lines = record.body
+        self._index = 0
+        self._lineno = record.line[0]
+
+    def readline(self):
+        """ Return next line, or '' if none. """
+        if self._index >= len(self._lines):
+            return ''
+        self._lineno, line = self._lines[self._index]
+        self._index += 1
+        return line+'\n'
+
+    def lineno(self):
+        """ Return line number of last line read. """
+        return self._lineno
+
+    def remaining(self):
+        """ Return (lineno, text) for lines not read. """
+        return self._lines[self._index:]
+
+
+class _Reference(object):
+    """ Reference conditions for reading a record's data lines. """
+
+    def __init__(self, pref, tref):
+        self.pref = pref
+        self.tref = tref
+
+
+def _color_pairs(pairs):
+    """
+    Greedy edge coloring: assign each pair (in order) to the first round
+    in which neither of its blocks is busy. Returns pairs for each round.
+    """
+    busy = {}    # Maps block to set of rounds it is busy in.
+    rounds = []  # Pairs for each round.
+    for pair in pairs:
+        busy1 = busy.setdefault(pair.lblock1, set())
+        busy2 = busy.setdefault(pair.lblock2, set())
+        rnd = 0
+        while rnd in busy1 or rnd in busy2:
+            rnd += 1
+        busy1.add(rnd)
+        busy2.add(rnd)
+        if rnd == len(rounds):
+            rounds.append([])
+        rounds[rnd].append(pair)
+    return rounds
 
 
 class BCPair(object):
-    """ Paired BCs which communicate. Used for scheduling. """
+    """
+    Paired BCs which communicate. Used for scheduling.
+    `size` is the size of the exchange, `position` is the index of the later
+    BC in the BC order the pair was found in.
+    """
 
-    def __init__(self, bc1, bc2, lblock1, lblock2):
+    def __init__(self, bc1, bc2, lblock1, lblock2, size=0, position=0):
         self.bc1 = bc1
         self.bc2 = bc2
         self.lblock1 = lblock1
         self.lblock2 = lblock2
+        self.size = size
+        self.position = position
 
 
 class Boundata(Container):
-    """ ADPAC boundary condition file handling. """
+    """
+    ADPAC boundary condition file handling.
+    BCs are parsed into :class:`BCRecord` objects, which are replaced by full
+    BC containers when accessed by name (``BC_<N>``).
+    Header fields of all BCs are available as columns via :meth:`table`.
+    """
 
     def __init__(self, *args, **kwargs):
         super(Boundata, self).__init__(*args, **kwargs)
         self._bcs = []
-
-    def read(self, casename, input_ref=None):
+        self._records = {}  # Maps name to unpromoted record.
+        self._table = None  # Header table, rebuilt when None.
+        self._index = None  # (table, index) last built by find().
+
+    def __getattr__(self, name):
+        """ Promote record `name` to a BC on first access. """
+        records = self.__dict__.get('_records')
+        if records and name in records:
+            return self._promote(records[name])
+        raise AttributeError("'%s' object has no attribute '%s'"
+                             % (self.__class__.__name__, name))
+
+    def read(self, casename, input_ref=None, cache=None):
         """
         Read boundary condition information from ``<casename>.boundata``.
         `input_ref` provides an :class:`Input` object for reference conditions.
         Note that unlike ADPAC, unrecognized keywords are treated as an error.
+        BCs are only created as containers when accessed (see
+        :class:`BCRecord`).
+        If `cache` (a :class:`ParseCache`) is specified, a previously parsed
+        representation of identical file contents (and reference conditions)
+        is used if available.
         """
         if input_ref is None:
             self._logger.warning('Using default reference values.')
-            input_ref = INPUT
+            input_ref = default_input()
 
+        for _bc in self._bcs:
+            if not isinstance(_bc, BCRecord):
+                self.remove(_bc.name)
         self._bcs = []
-        inp = fileinput.FileInput(casename+'.boundata', mode='rU')
-        try:
-            line = inp.readline()
-            while line:
-                tokens = line.upper().split()
-                if not tokens:
-                    line = inp.readline()
-                    continue  # Blank.
-
+        self._records = {}
+        self._table = None
+
+        filename = casename+'.boundata'
+        context = (input_ref.pref, input_ref.tref)
+        if cache is not None:
+            state = cache.get('boundata', filename, context)
+            if state is not None:
+                self._set_state(state, context)
+                return
+
+        self._parse(filename, context)
+
+        if cache is not None:
+            cache.put('boundata', filename, self._get_state(), context)
+
+    def _get_state(self):
+        """ Return cacheable representation of records just parsed. """
+        records = self._bcs
+        state = {
+            'type_name': [record.type_name for record in records],
+            'lineno': [record.line[0] for record in records],
+            'line': [record.line[1] for record in records],
+            'text': [record.text for record in records],
+            'body_record': [], 'body_lineno': [], 'body_line': [],
+        }
+        for i, record in enumerate(records):
+            for lineno, line in record.body:
+                state['body_record'].append(i)
+                state['body_lineno'].append(lineno)
+                state['body_line'].append(line)
+        for attr in HEADER_FIELDS:
+            state[attr] = [getattr(record, attr) for record in records]
+        return encode_values(state)
+
+    def _set_state(self, state, context):
+        """ Restore records from `state` returned by :meth:`_get_state`. """
+        values = decode_values(state)
+        records = []
+        for i, type_name in enumerate(values['type_name']):
+            record = BCRecord(lookup(type_name), type_name, 'BC_%d' % (i+1),
+                              (values['lineno'][i], values['line'][i]),
+                              context)
+            record.text = values['text'][i]
+            for attr in HEADER_FIELDS:
+                setattr(record, attr, values[attr][i])
+            records.append(record)
+        for i, lineno, line in zip(values['body_record'],
+                                   values['body_lineno'], values['body_line']):
+            records[i].body.append((lineno, line))
+        self._bcs = records
+        self._records = dict([(record.name, record) for record in records])
+
+    def _parse(self, filename, context):
+        """ Parse `filename` into records. """
+        with open(filename, 'rU') as inp:
+            lines = inp.read().splitlines()
+
+        rows = []
+        record = None
+        for lineno, line in enumerate(lines):
+            lineno += 1
+            tokens = line.upper().split()
+            if tokens:
                 typ = tokens[0]
-                if typ[0] == '#':
-                    line = inp.readline()
-                    continue  # Comment.
-                elif typ == 'ENDDATA':
-                    break     # End of input.
-
-                name = 'BC_%d' % (len(self._bcs)+1)
-
-                # Dispatch based on BC type.
-                try:
-                    new_bc = self.add(name, _REGISTRY[typ](typ))
-                except KeyError:
-                    self.raise_exception("line %d: unrecognized BC type '%s'" \
-                                         % (inp.lineno(), typ), ValueError)
-
-                # Read remaining data and add this BC.
-                try:
-                    new_bc.read(tokens, inp, input_ref)
-                except Exception:
-                    self.remove(name)
-                    raise
-                else:
-                    self._bcs.append(new_bc)
-
-                line = inp.readline()
-        finally:
-            inp.close()
+                if typ == 'ENDDATA' or \
+                   (_is_bc_type(typ) and _header_error(tokens) is None):
+                    if record is not None:
+                        self._add_record(record)
+                        record = None
+                    if typ == 'ENDDATA':
+                        break  # End of input.
+                    record = self._new_record(typ, tokens, lineno, line,
+                                              context)
+                    rows.append((type_code(typ),) +
+                                tuple([getattr(record, attr)
+                                       for attr in HEADER_FIELDS]))
+                    continue
+                elif typ[0] != '#' and record is None:
+                    self._bad_header(tokens, lineno)
+            if record is not None:
+                record.body.append((lineno, line.rstrip()))
+
+        if record is not None:
+            self._add_record(record)
+        self._table = numpy.array(rows, dtype=BC_DTYPE)
+
+    def _new_record(self, typ, tokens, lineno, line, context):
+        """ Return record for BC header `line`. """
+        name = 'BC_%d' % (len(self._bcs)+1)
+        record = BCRecord(lookup(typ), typ, name, (lineno, line), context)
+
+        for attr, token in zip(HEADER_FIELDS, tokens[1:]):
+            setattr(record, attr, token if attr in _LETTERS else int(token))
+        return record
+
+    def _bad_header(self, tokens, lineno):
+        """ Report line `lineno` (`tokens`) which should be a BC header. """
+        if _is_bc_type(tokens[0]):
+            self.raise_exception('line %d: %s' % (lineno,
+                                                  _header_error(tokens)),
+                                 ValueError)
+        self.raise_exception("line %d: unrecognized BC type '%s'"
+                             % (lineno, tokens[0]), ValueError)
+
+    def _add_record(self, record):
+        """
+        Add completed `record`. Data lines are read by a temporary BC (not
+        added to this container) to check them and generate `record.text`.
+        """
+        while record.body and _is_blank(record.body[-1][1]):
+            record.body.pop()
+        if not _overrides(record.cls, 'read'):
+            for lineno, line in record.body:
+                if not _is_blank(line):
+                    self._bad_header(line.upper().split(), lineno)
+            record.body = []
+        elif record.body:
+            ref = _Reference(*record.context)
+            new_bc = record.cls(record.type_name)
+            try:
+                self._read_record(record, new_bc, ref)
+            except ValueError as exc:
+                self.raise_exception('%s: %s' % (record.name, exc),
+                                     ValueError)
+            header = format_header(new_bc, 0)
+            out = StringIO()
+            new_bc.write(out, 0, ref)
+            text = out.getvalue()
+            record.text = text[text.index(header)+len(header):]
+        self._bcs.append(record)
+        self._records[record.name] = record
+
+    def _read_record(self, record, new_bc, ref):
+        """ Read `record` data lines into `new_bc`. """
+        lines = _RecordLines(record)
+        new_bc.read(record.line[1].upper().split(), lines, ref)
+        for lineno, line in lines.remaining():
+            if not _is_blank(line):
+                self._bad_header(line.upper().split(), lineno)
+
+    def _promote(self, record):
+        """ Replace `record` by a full BC, which is returned. """
+        name = record.name
+        new_bc = self.add(name, record.cls(record.type_name))
+        try:
+            self._read_record(record, new_bc, _Reference(*record.context))
+            for attr in HEADER_FIELDS:  # Header may have been modified.
+                setattr(new_bc, attr, getattr(record, attr))
+        except Exception:
+            self.remove(name)
+            raise
+
+        del self._records[name]
+        for i, _bc in enumerate(self._bcs):
+            if _bc is record:
+                self._bcs[i] = new_bc
+                break
+        return new_bc
+
+    def _pathname(self, name):
+        """ Return pathname of BC `name`. """
+        path = self.get_pathname()
+        return '%s.%s' % (path, name) if path else name
+
+    def table(self):
+        """
+        Return structured array (:data:`BC_DTYPE`) with a row of header
+        fields for each BC, in BC order. The ``type`` column holds
+        :func:`type_code` values. Do not modify the returned array.
+        """
+        if self._table is None:
+            bcs = self._bcs
+            table = numpy.empty(len(bcs), dtype=BC_DTYPE)
+            table['type'] = [type_code(_bc.type_name) for _bc in bcs]
+            for attr in HEADER_FIELDS:
+                values = [getattr(_bc, attr) for _bc in bcs]
+                if attr in _LETTERS:
+                    # Not a legal letter, reported by config_errors().
+                    values = [value if len(value) == 1 else '?'
+                              for value in values]
+                table[attr] = values
+            self._table = table
+        return self._table
+
+    def find(self, type_name, lblock1, lface1, ldir1):
+        """
+        Return indices (in BC order) of BCs of `type_name` on face `lface1`
+        of block `lblock1` with direction `ldir1`.
+        Uses an index which is rebuilt along with :meth:`table`.
+        """
+        table = self.table()
+        if self._index is None or self._index[0] is not table:
+            index = {}
+            keys = zip(table['type'].tolist(), table['lblock1'].tolist(),
+                       table['lface1'].tolist(), table['ldir1'].tolist())
+            for i, key in enumerate(keys):
+                index.setdefault(key, []).append(i)
+            self._index = (table, index)
+        return self._index[1].get((type_code(type_name), lblock1,
+                                   lface1, ldir1), [])
+
+    def where(self, type_name=None, **fields):
+        """
+        Return indices (in BC order) of BCs of `type_name` (if specified)
+        whose header fields match `fields`, for example
+        ``where('SSVI', lblock1=7, lface1='K')``.
+        """
+        table = self.table()
+        mask = numpy.ones(len(table), dtype=bool)
+        if type_name is not None:
+            mask &= table['type'] == type_code(type_name)
+        for name, value in fields.items():
+            if name not in HEADER_FIELDS:
+                self.raise_exception('%r is not a header field' % name,
+                                     ValueError)
+            mask &= table[name] == value
+        return numpy.flatnonzero(mask)
 
     def check_config(self):
-        """ Check sanity of current configuration. """
-        for _bc in self._bcs:
-            _bc.check_config()
+        """
+        Check sanity of current configuration. All errors found are logged
+        and reported in a single exception.
+        """
+        errors = self.config_errors()
+        if errors:
+            for error in errors:
+                self._logger.error(error)
+            self.raise_exception('%d configuration errors:\n    %s'
+                                 % (len(errors), '\n    '.join(errors)),
+                                 ValueError)
+
+    def config_errors(self):
+        """
+        Return list of messages describing all configuration errors.
+        Fields common to all BCs are checked across all BCs at once, then
+        BC-specific checks are run for those BCs which passed.
+        """
+        from adpac_wrapper.bc import LETTER_CHECKS, LIMIT_CHECKS
+
+        bcs = self._bcs
+        if not bcs:
+            return []
+        table = self.table()
+        errors = {}  # Maps BC index to list of messages.
+
+        for attr, legal, msg in LETTER_CHECKS:
+            values = table[attr]
+            bad = numpy.flatnonzero(~numpy.in1d(values, legal))
+            for i in bad.tolist():
+                errors.setdefault(i, []).append(
+                    '%s (%s) %s' % (attr, getattr(bcs[i], attr), msg))
+
+        for attr1, attr2, strict in LIMIT_CHECKS:
+            values1 = table[attr1]
+            values2 = table[attr2]
+            if strict:
+                bad = numpy.flatnonzero(values1 <= values2)
+            else:
+                bad = numpy.flatnonzero(values1 < values2)
+            for i in bad.tolist():
+                errors.setdefault(i, []).append(
+                    '%s (%d) must be %s %s (%d).'
+                    % (attr1, values1[i], '>' if strict else '>=',
+                       attr2, values2[i]))
+
+        messages = []
+        for i, _bc in enumerate(list(bcs)):
+            if i in errors:
+                path = self._pathname(_bc.name)
+                messages.extend(['%s: %s' % (path, msg) for msg in errors[i]])
+                continue
+            if isinstance(_bc, BCRecord):
+                if not _has_specific_checks(_bc.cls):
+                    continue
+                try:
+                    _bc = self._promote(_bc)
+                except ValueError as exc:
+                    messages.append(str(exc))
+                    continue
+            elif not _has_specific_checks(_bc.__class__):
+                continue
+            try:
+                _bc.check_config()
+            except ValueError as exc:
+                messages.append(str(exc))
+        return messages
 
     def write(self, casename, input_ref=None):
         """
         Write boundary condition information to ``<casename>.boundata``.
         `input_ref` provides a :class:`Input` object for reference conditions.
+        Only modified BCs are re-formatted (BCs never accessed are written
+        using text generated when read, identical to that written had they
+        been accessed), and the file is only written if its contents would
+        change.
         """
         if input_ref is None:
             self._logger.warning('Using default reference values.')
-            input_ref = bc.INPUT
+            input_ref = default_input()
 
-        with open(casename+'.boundata', 'w') as out:
-            out.write("""\
-# B        L   L L L L L L L   L   L   M   M   N   N   M   M   N   N
-# C        B   B F F D D S S   1   2   1   1   1   1   2   2   2   2
-# T        L   L A A I I P P   L   L   L   L   L   L   L   L   L   L
-# Y        O   O C C R R E E   I   I   I   I   I   I   I   I   I   I
-# P        C   C E E 1 2 C C   M   M   M   M   M   M   M   M   M   M
-# E        K   K 1 2     1 2           1   2   1   2   1   2   1   2
-#          1   2
-# ------ --- --- - - - - - - --- --- --- --- --- --- --- --- --- ---
-""")
-            for i, _bc in enumerate(self._bcs):
-                _bc.write(out, i+1, input_ref)
+        context = (input_ref.pref, input_ref.tref)
+        text = [_HEADER]
+        for i, _bc in enumerate(self._bcs):
+            if isinstance(_bc, BCRecord) and _bc.text and \
+               _bc.context != context:
+                _bc = self._promote(_bc)  # Data needs re-dimensionalizing.
+            text.append(_bc.format(i+1, input_ref))
+        write_if_changed(casename+'.boundata', ''.join(text))
 
     def schedule(self):
         """
-        Perform a (simple-minded) enhanced scheduling of the boundary
-        conditions. On a realistic test case the improvement was measurable
-        (approx 7%), though not significant. Currently only 'PATCH' boundary
-        conditions are scheduled. Including other BCs may improve the enhanced
-        scheduling effect.
+        Schedule 'PATCH' boundary conditions to improve communication
+        overlap. Patches between blocks are combined into exchange pairs,
+        which are assigned to communication rounds such that no block takes
+        part in more than one exchange per round (an edge coloring of the
+        block graph). Larger exchanges are assigned first, to the earliest
+        round available. BCs are then ordered as local patches, exchange
+        pairs by round, then non-patch BCs. Returns the number of rounds.
+        See also :meth:`schedule_by_cost`.
 
         .. warning::
            if patches intentionally overlap, this rescheduling may break
            the configuration!
 
         """
-        local = []        # Patch within a block.
-        patches = []      # Patch between blocks.
-        non_patches = []  # Non-patch BCs.
+        local, pairs, non_patches = self._split_patches()
+        rounds = _color_pairs(pairs)
+        self._logger.debug('schedule: %d exchanges in %d rounds',
+                           len(pairs), len(rounds))
+        self._set_order(local, [pair for sched in rounds for pair in sched],
+                        non_patches)
+        return len(rounds)
+
+    def schedule_by_cost(self, model):
+        """
+        Schedule 'PATCH' boundary conditions using the exchange timeline
+        predicted by `model` (a :class:`CommModel`). Candidate orderings of
+        the exchange pairs are simulated and the one with the lowest
+        predicted makespan is used (the current pair order is kept if none
+        is better). BCs are ordered as for :meth:`schedule`.
+        Returns the predicted :class:`Timeline`.
+        """
+        local, pairs, non_patches = self._split_patches()
+        costs = [model.cost(pair) for pair in pairs]
+        ready = model.ready_times(pairs)
+        by_cost = sorted(range(len(pairs)), key=lambda i: -costs[i])
+        by_ready = sorted(range(len(pairs)),
+                          key=lambda i: (ready[i], -costs[i]))
+        candidates = (
+            ('current', sorted(pairs, key=lambda pair: pair.position)),
+            ('rounds', [pair for sched in _color_pairs(pairs)
+                        for pair in sched]),
+            ('cost', [pairs[i] for i in by_cost]),
+            ('ready', [pairs[i] for i in by_ready]),
+        )
+
+        best = None
+        for strategy, order in candidates:
+            timeline = model.simulate(order, strategy)
+            self._logger.debug('schedule_by_cost: %s makespan %g',
+                               strategy, timeline.makespan)
+            if best is None or timeline.makespan < best[1].makespan:
+                best = (order, timeline)
+
+        self._set_order(local, best[0], non_patches)
+        return best[1]
+
+    def predict_timeline(self, model):
+        """
+        Return the :class:`Timeline` predicted by `model` (a
+        :class:`CommModel`) for the current BC order.
+        """
+        pairs = self._split_patches()[1]
+        pairs.sort(key=lambda pair: pair.position)
+        return model.simulate(pairs, 'current')
+
+    def _split_patches(self):
+        """
+        Return ``(local, pairs, non_patches)``: patches within a block,
+        :class:`BCPair` exchanges between blocks (by decreasing size), and
+        non-patch BCs.
+        """
+        bcs = self._bcs
+        table = self.table()
 
         # Split into patch & non-patch BCs.
         # Only schedule *communicating* patches.
-        for _bc in self._bcs:
-            if _bc.type_name == 'PATCH':
-                if _bc.lblock1 != _bc.lblock2:
-                    # Insertion sort by decreasing size, increasing lblock1.
-                    size = _bc.size()
-                    for i, patch in enumerate(patches):
-                        if size > patch.size() or \
-                           size == patch.size() and _bc.lblock1 < patch.lblock1:
-                            patches.insert(i, _bc)
-                            break
-                    else:
-                        patches.append(_bc)
-                else:
-                    local.append(_bc)
-            else:
-                non_patches.append(_bc)
-
-        # Now schedule for communications.
-
-        # Combine exchanges into pairs of patches.
-        pairs = []
-        while patches:
-            bc1 = patches[0]
-
-            # Look for other half of exchange.
-            for i, bc2 in enumerate(patches):
-                if (bc2.lblock1 == bc1.lblock2) and \
-                   (bc2.lblock2 == bc1.lblock1):
-                    pairs.append(BCPair(bc1, bc2, bc1.lblock1, bc1.lblock2))
-                    patches.pop(i)
-                    patches.pop(0)
-                    break
+        is_patch = table['type'] == type_code('PATCH')
+        exchange = is_patch & (table['lblock1'] != table['lblock2'])
+        local = [bcs[i] for i in numpy.flatnonzero(is_patch & ~exchange)]
+        non_patches = [bcs[i] for i in numpy.flatnonzero(~is_patch)]
+
+        # Sort by decreasing size, increasing lblock1 (stable).
+        indices = numpy.flatnonzero(exchange)
+        sizes = (abs(table['m1lim1'] - table['m1lim2']) + 1) \
+              * (abs(table['n1lim1'] - table['n1lim2']) + 1)
+        order = numpy.lexsort((table['lblock1'][indices], -sizes[indices]))
+        indices = indices[order].tolist()
+        sizes = sizes.tolist()
+        lblock1 = table['lblock1'].tolist()
+        lblock2 = table['lblock2'].tolist()
+
+        # Combine exchanges into pairs of patches: each patch is paired with
+        # the earliest unpaired patch in the opposite direction.
+        waiting = {}  # Maps (lblock1, lblock2) to unpaired patch positions.
+        pairs = [None] * len(indices)  # Indexed by position of first patch.
+        for pos, i in enumerate(indices):
+            blocks = (lblock1[i], lblock2[i])
+            other = waiting.get((blocks[1], blocks[0]))
+            if other:
+                first = other.popleft()
+                j = indices[first]
+                pairs[first] = BCPair(bcs[j], bcs[i], lblock1[j], lblock2[j],
+                                      sizes[j], max(i, j))
             else:
-                msg = 'No match for PATCH BC lblock1 %d, lblock2 %d' \
-                      % (bc1.lblock1, bc1.lblock2)
-                self.raise_exception(msg, RuntimeError)
-
-        # Determine highest block number.
-        max_block = 0
-        for pair in pairs:
-            max_block = max(max_block, pair.lblock1, pair.lblock2)
-
-        sched = []    # Scheduled exchanges.
-        pending = []  # Waiting on busy.
-        while pairs:
-            self._logger.debug('schedule: new pass')
-
-            # Clear busy flags (block numbers use 1-origin).
-            busy = [False] * (max_block+1)
-
-            # Process any pending blocks.
-#TODO: Try to find way to 'unblock' best pair.
-#      Currently a small pending scheduled here can block a larger pair
-#      not yet processed.
-            for pair in pending:
-                self._logger.debug('    not-pending: %d %d %d',
-                                   pair.lblock1, pair.lblock2, pair.bc1.size())
-                sched.append(pair)
-                busy[pair.lblock1] = True
-                busy[pair.lblock2] = True
-            pending = []
-
-            # Process remaining pairs.
-            self._logger.debug('    pairs:')
-            for pair in pairs:
-                self._logger.debug('       %d %d %d',
-                                   pair.lblock1, pair.lblock2, pair.bc1.size())
-
-            processed = []
-            for pair in pairs:
-                if busy[pair.lblock1]:
-                    if busy[pair.lblock2]:
-                        self._logger.debug('    busy: %d %d %d', pair.lblock1,
-                                           pair.lblock2, pair.bc1.size())
-                        continue
-                    else:
-                        self._logger.debug('    pending: %d %d %d', pair.lblock1,
-                                           pair.lblock2, pair.bc1.size())
-                        busy[pair.lblock2] = True
-                        pending.append(pair)
-                        processed.append(pair)
-                else:
-                    if busy[pair.lblock2]:
-                        self._logger.debug('    pending: %d %d %d', pair.lblock1,
-                                          pair.lblock2, pair.bc1.size())
-                        pending.append(pair)
-                    else:
-                        self._logger.debug('    scheduled: %d %d %d', pair.lblock1,
-                                           pair.lblock2, pair.bc1.size())
-                        busy[pair.lblock2] = True
-                        sched.append(pair)
-                    busy[pair.lblock1] = True
-                    processed.append(pair)
-
-            for pair in processed:
-                pairs.remove(pair)
-
-        # Copy any pending blocks to end of schedule.
-        for pair in pending:
-            self._logger.debug('    not-pending: %d %d %d',
-                               pair.lblock1, pair.lblock2, pair.bc1.size())
-            sched.append(pair)
-
-        # Merge scheduled patches & non-patches.
+                waiting.setdefault(blocks, collections.deque()).append(pos)
+        unpaired = [queue[0] for queue in waiting.values() if queue]
+        if unpaired:
+            i = indices[min(unpaired)]
+            msg = 'No match for PATCH BC lblock1 %d, lblock2 %d' \
+                  % (lblock1[i], lblock2[i])
+            self.raise_exception(msg, RuntimeError)
+        pairs = [pair for pair in pairs if pair is not None]
+        return (local, pairs, non_patches)
+
+    def _set_order(self, local, pairs, non_patches):
+        """ Set BC order from scheduled patches & non-patches. """
         self._bcs = []
+        self._table = None
         self._bcs.extend(local)
-        for pair in sched:
+        for pair in pairs:
             self._bcs.append(pair.bc1)
             self._bcs.append(pair.bc2)
         self._bcs.extend(non_patches)
@@ -0,0 +1,153 @@
+"""
+Content-addressed cache of parsed ``.input`` and ``.boundata`` files.
+Entries are keyed on a digest of the file contents plus any parsing context
+(such as reference conditions), so identical files in different case
+directories share an entry. File digests are remembered by path, size, and
+modification time so unchanged files are not re-hashed.
+
+Entries are NumPy ``.npz`` files of plain arrays, loaded without pickle
+support, so a cache directory shared with others can't be used to run code.
+"""
+
+import hashlib
+import os.path
+from io import BytesIO
+
+import numpy
+
+from openmdao.main.api import Container
+
+from adpac_wrapper.util import atomic_write
+
+# Version of the cached representation, part of every key.
+VERSION = 5
+
+# Maps absolute path to ((size, mtime, inode), digest).
+_DIGESTS = {}
+
+
+def file_digest(path):
+    """ Return SHA1 hex digest of the contents of `path`. """
+    path = os.path.abspath(path)
+    info = os.stat(path)
+    stamp = (info.st_size, info.st_mtime, info.st_ino)
+    entry = _DIGESTS.get(path)
+    if entry is not None and entry[0] == stamp:
+        return entry[1]
+
+    sha1 = hashlib.sha1()
+    with open(path, 'rb') as inp:
+        while True:
+            data = inp.read(1 << 20)
+            if not data:
+                break
+            sha1.update(data)
+    digest = sha1.hexdigest()
+    _DIGESTS[path] = (stamp, digest)
+    return digest
+
+
+def trait_values(obj):
+    """
+    Return dictionary of the public, non-container attribute values which
+    have been set on `obj`.
+    """
+    values = {}
+    for name, value in obj.__dict__.items():
+        if name[0] != '_' and name != 'parent' and \
+           not isinstance(value, Container):
+            values[name] = value
+    return values
+
+
+def encode_values(values):
+    """
+    Return dictionary of arrays representing `values`, a dictionary mapping
+    name to a bool, number, string, list of strings or of numbers, or
+    non-object array. Returns None if some value can't be represented.
+    """
+    arrays = {}
+    for name, value in values.items():
+        if isinstance(value, numpy.ndarray):
+            kind = 'a'
+        elif isinstance(value, list):
+            kind = 'l'
+            value = list(value)
+            if len(set([isinstance(item, basestring) for item in value])) > 1:
+                return None  # Would be converted to strings.
+            if not value:
+                value = numpy.zeros(0, dtype='S1')
+        elif isinstance(value, (bool, int, long, float, basestring,
+                                numpy.generic)):
+            kind = 's'
+        else:
+            return None
+        array = numpy.asarray(value)
+        if array.dtype.hasobject:
+            return None
+        arrays['%s:%s' % (kind, name)] = array
+    return arrays
+
+
+def decode_values(arrays):
+    """ Return dictionary of values encoded by :func:`encode_values`. """
+    values = {}
+    for key, array in arrays.items():
+        kind, name = key.split(':', 1)
+        if kind == 'a':
+            values[name] = array
+        elif kind == 'l':
+            values[name] = array.tolist()
+        else:
+            values[name] = array.item()
+    return values
+
+
+class ParseCache(object):
+    """ Cache of parsed file representations stored in `directory`. """
+
+    def __init__(self, directory):
+        self.directory = directory
+        if not os.path.isdir(directory):
+            try:
+                os.makedirs(directory)
+            except OSError:
+                if not os.path.isdir(directory):  # Not a creation race.
+                    raise
+
+    def get(self, kind, filename, context=()):
+        """
+        Return cached representation (dictionary of arrays) of `filename`
+        parsed as `kind` with `context`, or None.
+        """
+        path = self._path(kind, filename, context)
+        try:
+            data = numpy.load(path, allow_pickle=False)
+            try:
+                return dict([(name, data[name]) for name in data.files])
+            finally:
+                data.close()
+        except Exception:
+            return None  # Missing, corrupt, or incompatible entry.
+
+    def put(self, kind, filename, state, context=()):
+        """
+        Save representation `state` (dictionary of non-object arrays, or
+        None to not cache) of `filename` parsed as `kind` with `context`.
+        """
+        if state is None:
+            return
+        path = self._path(kind, filename, context)
+        out = BytesIO()
+        numpy.savez(out, **state)
+        try:
+            atomic_write(path, out.getvalue(), binary=True)
+        except OSError:
+            pass  # Another process may have written it.
+
+    def _path(self, kind, filename, context):
+        """ Return path to entry for `filename`. """
+        sha1 = hashlib.sha1()
+        sha1.update('%s %d %s %r' % (kind, VERSION, file_digest(filename),
+                                     tuple(context)))
+        return os.path.join(self.directory, sha1.hexdigest()+'.npz')
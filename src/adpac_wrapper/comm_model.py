@@ -0,0 +1,159 @@
+"""
+Cost model for ADPAC boundary data exchanges, used by
+:meth:`Boundata.schedule_by_cost`. Exchanges are processed in BC order,
+each rank handling those involving its blocks. An exchange between ranks
+starts when both ranks are ready (blocking send/receive), an exchange
+within a rank is a copy. Each rank first updates its blocks, taking time
+proportional to their cell count. The predicted :class:`Timeline` can be
+compared with ADPAC's ``-s all`` statistics.
+"""
+
+from openmdao.lib.datatypes.domain import read_plot3d_shape
+
+
+def block_cells(mesh_file, big_endian=True, unformatted=False):
+    """
+    Return list of cell counts per block read from the header of
+    multiblock 3D Plot3D `mesh_file`.
+    """
+    shape = read_plot3d_shape(mesh_file, multiblock=True, dim=3,
+                              big_endian=big_endian, unformatted=unformatted)
+    cells = []
+    for dims in shape:
+        count = 1
+        for dim in dims:
+            count *= max(dim-1, 1)
+        cells.append(count)
+    return cells
+
+
+class CommModel(object):
+    """
+    Predicts exchange timelines.
+    `cells` is the cell count for each block (see :func:`block_cells`),
+    `ranks` is the MPI rank for each block (by default each block has its
+    own rank). An exchange of `size` points costs ``latency + size *
+    point_time`` between ranks and ``size * copy_time`` within a rank.
+    Updating a block costs `cell_time` per cell.
+    """
+
+    def __init__(self, cells=None, ranks=None, latency=2e-5, point_time=4e-8,
+                 copy_time=4e-9, cell_time=1e-6):
+        self.cells = cells
+        self.ranks = ranks
+        self.latency = latency
+        self.point_time = point_time
+        self.copy_time = copy_time
+        self.cell_time = cell_time
+
+    def rank(self, block):
+        """ Return rank of `block` (starting at 1). """
+        if self.ranks is None:
+            return block - 1
+        return self.ranks[block-1]
+
+    def compute_time(self, block):
+        """ Return time to update `block`. """
+        if self.cells is None:
+            return 0.
+        return self.cells[block-1] * self.cell_time
+
+    def cost(self, pair):
+        """ Return time for exchange :class:`BCPair` `pair`. """
+        if self.rank(pair.lblock1) == self.rank(pair.lblock2):
+            return pair.size * self.copy_time
+        return self.latency + pair.size * self.point_time
+
+    def ready_times(self, pairs):
+        """
+        Return list of earliest time each :class:`BCPair` in `pairs` could
+        start (when both ranks have updated their blocks).
+        """
+        compute = self.rank_compute()
+        return [max(compute.get(self.rank(pair.lblock1), 0.),
+                    compute.get(self.rank(pair.lblock2), 0.))
+                for pair in pairs]
+
+    def rank_compute(self):
+        """ Return dictionary mapping rank to block update time. """
+        compute = {}
+        if self.cells is not None:
+            for i in range(len(self.cells)):
+                rank = self.rank(i+1)
+                compute[rank] = compute.get(rank, 0.) + self.compute_time(i+1)
+        return compute
+
+    def simulate(self, pairs, strategy=''):
+        """
+        Return :class:`Timeline` for exchanging :class:`BCPair` `pairs`
+        in order. `strategy` describes how the order was determined.
+        """
+        compute = self.rank_compute()
+        ready = dict(compute)
+        exchanges = []
+        for pair in pairs:
+            rank1 = self.rank(pair.lblock1)
+            rank2 = self.rank(pair.lblock2)
+            start = max(ready.get(rank1, 0.), ready.get(rank2, 0.))
+            end = start + self.cost(pair)
+            ready[rank1] = end
+            ready[rank2] = end
+            exchanges.append(Exchange(pair, rank1, rank2, start, end))
+        return Timeline(exchanges, compute, ready, strategy)
+
+
+class Exchange(object):
+    """ Predicted timing of an exchange. """
+
+    def __init__(self, pair, rank1, rank2, start, end):
+        self.pair = pair
+        self.rank1 = rank1
+        self.rank2 = rank2
+        self.start = start
+        self.end = end
+
+
+class Timeline(object):
+    """
+    Predicted exchange timeline. `compute` and `finish` map rank to block
+    update time and finish time.
+    """
+
+    def __init__(self, exchanges, compute, finish, strategy=''):
+        self.exchanges = exchanges
+        self.compute = compute
+        self.finish = finish
+        self.strategy = strategy
+        self.makespan = max(finish.values()) if finish else 0.
+
+    def report(self):
+        """ Return text report of exchanges and per-rank totals. """
+        lines = ['Predicted BC exchange timeline (%s): makespan %.6e sec'
+                 % (self.strategy or 'unspecified', self.makespan),
+                 '',
+                 '%-8s %-8s %7s %7s %5s %5s %7s %12s %12s'
+                 % ('BC1', 'BC2', 'LBLOCK1', 'LBLOCK2', 'RANK1', 'RANK2',
+                    'SIZE', 'START', 'END')]
+        comm = {}
+        for exchange in self.exchanges:
+            pair = exchange.pair
+            lines.append('%-8s %-8s %7d %7d %5d %5d %7d %12.6e %12.6e'
+                         % (pair.bc1.name, pair.bc2.name,
+                            pair.lblock1, pair.lblock2,
+                            exchange.rank1, exchange.rank2, pair.size,
+                            exchange.start, exchange.end))
+            duration = exchange.end - exchange.start
+            for rank in set((exchange.rank1, exchange.rank2)):
+                comm[rank] = comm.get(rank, 0.) + duration
+
+        lines.extend(['',
+                      '%5s %12s %12s %12s %12s'
+                      % ('RANK', 'COMPUTE', 'COMM', 'WAIT', 'FINISH')])
+        for rank in sorted(self.finish):
+            compute = self.compute.get(rank, 0.)
+            busy = comm.get(rank, 0.)
+            finish = self.finish[rank]
+            lines.append('%5d %12.6e %12.6e %12.6e %12.6e'
+                         % (rank, compute, busy,
+                            max(finish - compute - busy, 0.), finish))
+        return '\n'.join(lines)+'\n'
@@ -1,135 +1,333 @@
 import os.path
 
+import numpy
+
 from openmdao.main.api import Container
-from openmdao.lib.datatypes.api import List
+from openmdao.lib.datatypes.api import Array, Enum, Float, Int
+
+from adpac_wrapper.history import History, POLICIES
+
+
+# Columns of ``<casename>.converge``.
+_CONVERGE_COLUMNS = (
+    ('iteration', int),
+    ('max_error', float),
+    ('rms_error', float),
+    ('mass_inflow', float),
+    ('mass_outflow', float),
+    ('pressure_ratio', float),
+    ('efficiency', float),
+    ('ss_pts', int),
+    ('sep_pts', int),
+)
+
+# Columns of ``fort.42``.
+_ZOOM_COLUMNS = (
+    ('nstep', int),
+    ('ptinlt', float),
+    ('ttinlt', float),
+    ('emavin', float),
+    ('ptexit', float),
+    ('ttexit', float),
+    ('emavout', float),
+    ('eff', float),
+)
 
 
 class Converge(Container):
-    """ Processes the ADPAC ``<casename>.converge`` output file. """
-
-    max_error = List(float, iotype='out',
-                     desc='log10(maximum error value).')
-    rms_error = List(float, iotype='out',
-                     desc='log10(RMS error value).')
-    mass_inflow = List(float, units='lbm/s', iotype='out',
-                       desc='Inlet mass flow.')
-    mass_outflow = List(float, units='lbm/s', iotype='out',
-                        desc='Exit mass flow.')
-    pressure_ratio = List(float, iotype='out',
-                          desc='Exit/inlet pressure ratio.')
-    efficiency = List(float, iotype='out',
-                      desc='Adiabatic efficiency.')
-    ss_pts = List(int, iotype='out',
-                  desc='Number of supersonic points.')
-    sep_pts = List(int, iotype='out',
-                   desc='Number of seperated points.')
-
-    ptinlt = List(float, units='lbf/ft**2', iotype='out',
-                  desc='Inlet total pressure (from unit 42).')
-    ttinlt = List(float, units='degR', iotype='out',
-                  desc='Inlet total temperature (from unit 42).')
-    emavin = List(float, units='lbm/s', iotype='out',
-                  desc='Inlet mass flow (from unit 42).')
-    ptexit = List(float, units='lbf/ft**2', iotype='out',
-                  desc='Exit total pressure (from unit 42).')
-    ttexit = List(float, units='degR', iotype='out',
-                  desc='Exit total temperature (from unit 42).')
-    emavout = List(float, units='lbm/s', iotype='out',
-                   desc='Outlet mass flow (from unit 42).')
-    eff = List(float, iotype='out',
-               desc='Adiabatic efficiency (from unit 42).')
+    """
+    Processes the ADPAC ``<casename>.converge`` output file.
+
+    The retained iterations are selected by `history`. For each data column
+    ``<name>_last``, ``<name>_min``, and ``<name>_avg`` (moving average over
+    the last `average_window` iterations) are exact regardless of `history`.
+    History settings take effect when the data is next cleared.
+
+    The convergence rate is modelled as exponential decay of the RMS error
+    and of the relative mass flow mismatch, fitted over the last
+    `fit_window` iterations. `predicted_iterations` is the number of further
+    iterations needed to reach both `rms_tolerance` and `mass_tolerance`.
+    """
+
+    history = Enum('all', POLICIES, iotype='in',
+                   desc="Iterations retained: 'all', 'tail' (last"
+                        " history_size), or 'decimated' (tail plus"
+                        " log-spaced earlier iterations).")
+    history_size = Int(1000, low=1, iotype='in',
+                       desc='Number of most recent iterations retained'
+                            ' for non-\'all\' history.')
+    average_window = Int(100, low=1, iotype='in',
+                         desc='Number of iterations in moving averages.')
+
+    fit_window = Int(100, low=2, iotype='in',
+                     desc='Number of recent iterations used to fit'
+                          ' convergence rates.')
+    rms_tolerance = Float(-6., iotype='in',
+                          desc='Target log10(RMS error value).')
+    mass_tolerance = Float(1e-3, low=0., exclude_low=True, iotype='in',
+                           desc='Target relative mass flow mismatch.')
+
+    rms_slope = Float(0., iotype='out',
+                      desc='Fitted change in log10(RMS error value)'
+                           ' per iteration.')
+    mass_slope = Float(0., iotype='out',
+                       desc='Fitted change in log10(relative mass flow'
+                            ' mismatch) per iteration.')
+    predicted_iterations = Int(-1, iotype='out',
+                               desc='Predicted further iterations to reach'
+                                    ' rms_tolerance and mass_tolerance'
+                                    ' (-1 if not converging).')
+
+    iteration = Array(dtype=int, iotype='out',
+                      desc='Iteration number.')
+    max_error = Array(dtype=float, iotype='out',
+                      desc='log10(maximum error value).')
+    rms_error = Array(dtype=float, iotype='out',
+                      desc='log10(RMS error value).')
+    mass_inflow = Array(dtype=float, units='lbm/s', iotype='out',
+                        desc='Inlet mass flow.')
+    mass_outflow = Array(dtype=float, units='lbm/s', iotype='out',
+                         desc='Exit mass flow.')
+    pressure_ratio = Array(dtype=float, iotype='out',
+                           desc='Exit/inlet pressure ratio.')
+    efficiency = Array(dtype=float, iotype='out',
+                       desc='Adiabatic efficiency.')
+    ss_pts = Array(dtype=int, iotype='out',
+                   desc='Number of supersonic points.')
+    sep_pts = Array(dtype=int, iotype='out',
+                    desc='Number of seperated points.')
+
+    nstep = Array(dtype=int, iotype='out',
+                  desc='Iteration number (from unit 42).')
+    ptinlt = Array(dtype=float, units='lbf/ft**2', iotype='out',
+                   desc='Inlet total pressure (from unit 42).')
+    ttinlt = Array(dtype=float, units='degR', iotype='out',
+                   desc='Inlet total temperature (from unit 42).')
+    emavin = Array(dtype=float, units='lbm/s', iotype='out',
+                   desc='Inlet mass flow (from unit 42).')
+    ptexit = Array(dtype=float, units='lbf/ft**2', iotype='out',
+                   desc='Exit total pressure (from unit 42).')
+    ttexit = Array(dtype=float, units='degR', iotype='out',
+                   desc='Exit total temperature (from unit 42).')
+    emavout = Array(dtype=float, units='lbm/s', iotype='out',
+                    desc='Outlet mass flow (from unit 42).')
+    eff = Array(dtype=float, iotype='out',
+                desc='Adiabatic efficiency (from unit 42).')
+
+    def __init__(self, *args, **kwargs):
+        super(Converge, self).__init__(*args, **kwargs)
+        self._casename = None
+        self._files = {}  # Maps filename to (inode, offset, header lines).
+        self._histories = {}  # Maps filename to History.
+
+        # Summary statistics for data columns (first column is a counter).
+        for name, typ in _CONVERGE_COLUMNS[1:] + _ZOOM_COLUMNS[1:]:
+            units = self.trait(name).units
+            self.add_trait(name+'_last',
+                           Float(units=units, iotype='out',
+                                 desc='Last value of %s.' % name))
+            self.add_trait(name+'_min',
+                           Float(units=units, iotype='out',
+                                 desc='Minimum value of %s.' % name))
+            self.add_trait(name+'_avg',
+                           Float(units=units, iotype='out',
+                                 desc='Moving average of %s.' % name))
 
     def clear(self):
         """ Clear data. """
-        self.max_error = []
-        self.rms_error = []
-        self.mass_inflow = []
-        self.mass_outflow = []
-        self.pressure_ratio = []
-        self.efficiency = []
-        self.ss_pts = []
-        self.sep_pts = []
-
-        self.ptinlt = []
-        self.ttinlt = []
-        self.emavin = []
-        self.ptexit = []
-        self.ttexit = []
-        self.emavout = []
-        self.eff = []
+        self._clear(_CONVERGE_COLUMNS)
+        self._clear(_ZOOM_COLUMNS)
+        self._casename = None
+        self._files = {}
+        self._histories = {}
+        self.rms_slope = 0.
+        self.mass_slope = 0.
+        self.predicted_iterations = -1
+
+    def _clear(self, columns):
+        """ Clear data for `columns`. """
+        for name, typ in columns:
+            setattr(self, name, numpy.zeros(0, dtype=typ))
+        for name, typ in columns[1:]:
+            setattr(self, name+'_last', 0.)
+            setattr(self, name+'_min', 0.)
+            setattr(self, name+'_avg', 0.)
 
     def read(self, casename):
         """ Read ``<casename>.converge`` data. """
         self.clear()
+        self.update(casename)
 
-        with open(casename+'.converge', 'r') as inp:
-            line = inp.readline()  # Header lines.
-            line = inp.readline()
-            line = inp.readline()
-            line = inp.readline()
-            while line:
-                fields = line.split()
-                self.max_error.append(float(fields[1]))
-                self.rms_error.append(float(fields[2]))
-                self.mass_inflow.append(float(fields[3]))
-                self.mass_outflow.append(float(fields[4]))
-                self.pressure_ratio.append(float(fields[5]))
-                self.efficiency.append(float(fields[6]))
-                self.ss_pts.append(int(fields[7]))
-                self.sep_pts.append(int(fields[8]))
-                line = inp.readline()
+    def update(self, casename):
+        """
+        Read data appended to ``<casename>.converge`` (and ``fort.42``)
+        since the previous :meth:`read` or :meth:`update`. Only complete
+        lines are processed, so this may be called while ADPAC is running.
+        """
+        if casename != self._casename:
+            self.clear()
+            self._casename = casename
+
+        self._update(casename+'.converge', 4, _CONVERGE_COLUMNS)
+        self._fit_rates()
 
         # The zooming file (fort.42) is non-standard.
-        if not os.path.exists('fort.42'):
+        self._update('fort.42', 1, _ZOOM_COLUMNS)
+
+    def _fit_rates(self):
+        """
+        Fit log-linear (exponential decay) models to RMS error and mass flow
+        mismatch over the last `fit_window` iterations and update
+        `predicted_iterations`.
+        """
+        self.rms_slope = 0.
+        self.mass_slope = 0.
+        self.predicted_iterations = -1
+        if len(self.iteration) < max(self.fit_window, 2):
             return
 
-        with open('fort.42', 'r') as inp:
-            line = inp.readline()  # Header line.
-            line = inp.readline()
-            while line:
-                fields = line.split()
-                self.ptinlt.append(float(fields[1]))
-                self.ttinlt.append(float(fields[2]))
-                self.emavin.append(float(fields[3]))
-                self.ptexit.append(float(fields[4]))
-                self.ttexit.append(float(fields[5]))
-                self.emavout.append(float(fields[6]))
-                self.eff.append(float(fields[7]))
-                line = inp.readline()
+        iteration = self.iteration[-self.fit_window:].astype(float)
+        rms = self.rms_error[-self.fit_window:]
+        inflow = self.mass_inflow[-self.fit_window:]
+        outflow = self.mass_outflow[-self.fit_window:]
+        mismatch = numpy.abs(inflow - outflow) / \
+                   numpy.maximum(numpy.abs(inflow), 1e-30)
+        mismatch = numpy.log10(numpy.maximum(mismatch, 1e-30))
+
+        self.rms_slope, rms_needed = \
+            _predict(iteration, rms, self.rms_tolerance)
+        self.mass_slope, mass_needed = \
+            _predict(iteration, mismatch, numpy.log10(self.mass_tolerance))
+        if rms_needed >= 0 and mass_needed >= 0:
+            self.predicted_iterations = max(rms_needed, mass_needed)
+
+    def _update(self, filename, nheader, columns):
+        """
+        Append data for `columns` from lines of `filename` not yet processed.
+        The first `nheader` lines are skipped.
+        """
+        try:
+            info = os.stat(filename)
+        except OSError:
+            return
+
+        inode, offset, skip = self._files.get(filename, (info.st_ino, 0,
+                                                         nheader))
+        if inode != info.st_ino or info.st_size < offset:
+            # File has been rewritten, start over.
+            self._clear(columns)
+            self._histories.pop(filename, None)
+            offset, skip = 0, nheader
+        if info.st_size == offset:
+            return
+
+        with open(filename, 'rb') as inp:
+            inp.seek(offset)
+            data = inp.read(info.st_size - offset)
+        end = data.rfind('\n') + 1  # Ignore any partial last line.
+        start = 0
+        while skip and start < end:
+            start = data.index('\n', start) + 1
+            skip -= 1
+        self._files[filename] = (info.st_ino, offset+end, skip)
+
+        # Parse all new lines in one operation.
+        text = data[start:end]
+        tokens = text.split()
+        if not tokens:
+            return
+        ncols = len(text.lstrip().split('\n', 1)[0].split())
+        if ncols < len(columns) or len(tokens) % ncols:
+            self.raise_exception('%s: inconsistent number of columns'
+                                 % filename, RuntimeError)
+        block = numpy.array(tokens, dtype=float).reshape((-1, ncols))
+
+        history = self._histories.get(filename)
+        if history is None:
+            history = History(len(columns), self.history, self.history_size,
+                              self.average_window)
+            self._histories[filename] = history
+        history.append(block[:, :len(columns)])
+
+        values = history.rows()
+        average = history.average()
+        for i, (name, typ) in enumerate(columns):
+            # Float columns are views of the history, not copies.
+            setattr(self, name, values[:, i].astype(typ, copy=False))
+            if i:
+                setattr(self, name+'_last', history.last[i])
+                setattr(self, name+'_min', history.min[i])
+                setattr(self, name+'_avg', average[i])
+
+    def columns(self):
+        """ Return dictionary mapping column name to data array. """
+        return dict([(name, getattr(self, name))
+                     for name, typ in _CONVERGE_COLUMNS + _ZOOM_COLUMNS])
+
+    def save(self, filename='converge.npz'):
+        """
+        Save data (and summary statistics) in NumPy ``.npz`` format,
+        one array per column.
+        """
+        data = self.columns()
+        for name, typ in _CONVERGE_COLUMNS[1:] + _ZOOM_COLUMNS[1:]:
+            for suffix in ('_last', '_min', '_avg'):
+                data[name+suffix] = getattr(self, name+suffix)
+        numpy.savez_compressed(filename, **data)
+
+    def load(self, filename='converge.npz'):
+        """ Load data previously written by :meth:`save`. """
+        self.clear()
+        data = numpy.load(filename)
+        try:
+            for name in data.files:
+                value = data[name]
+                if value.ndim:
+                    setattr(self, name, value)
+                else:
+                    setattr(self, name, float(value))
+        finally:
+            data.close()
 
     def write(self, converge_name=None, zoom_name=None):
-        """ Write data out as CSV files. """
+        """
+        Write data out as CSV files. The first column is the iteration
+        (``nstep`` for the zooming file).
+        """
         converge_name = converge_name or 'converge.csv'
         zoom_name = zoom_name or 'zoom.csv'
 
-        with open(converge_name, 'w') as out:
-            out.write('i, max_error, rms_error, mass_inflow, mass_outflow,'
-                      ' pressure_ratio, efficiency, ss_pts, sep_pts\n')
-            for i in range(len(self.max_error)):
-                out.write('%g' % i)
-                out.write(', %g' % self.max_error[i])
-                out.write(', %g' % self.rms_error[i])
-                out.write(', %g' % self.mass_inflow[i])
-                out.write(', %g' % self.mass_outflow[i])
-                out.write(', %g' % self.pressure_ratio[i])
-                out.write(', %g' % self.efficiency[i])
-                out.write(', %g' % self.ss_pts[i])
-                out.write(', %g\n' % self.sep_pts[i])
+        names = [name for name, typ in _CONVERGE_COLUMNS]
+        _write_csv(converge_name, names,
+                   [getattr(self, name) for name in names])
 
         # The zooming file (fort.42) is non-standard.
         if len(self.nstep) <= 0:
             return
 
-        with open(zoom_name, 'w') as out:
-            out.write('i, ptinlt, ttinlt, emavin,'
-                      ' ptexit, ttexit, emavout, eff\n')
-            for i in range(len(self.ptinlt)):
-                out.write('%g' % i)
-                out.write(', %g' % self.ptinlt[i])
-                out.write(', %g' % self.ttinlt[i])
-                out.write(', %g' % self.emavin[i])
-                out.write(', %g' % self.ptexit[i])
-                out.write(', %g' % self.ttexit[i])
-                out.write(', %g' % self.emavout[i])
-                out.write(', %g\n' % self.eff[i])
+        names = [name for name, typ in _ZOOM_COLUMNS]
+        _write_csv(zoom_name, names,
+                   [getattr(self, name) for name in names])
+
+
+def _predict(x, y, target):
+    """
+    Fit line to `y(x)`. Returns ``(slope, n)`` where `n` is the number of
+    steps in `x` beyond the last point until the fit reaches `target`,
+    or -1 if the fit is not decreasing toward it.
+    """
+    slope, intercept = numpy.polyfit(x, y, 1)
+    current = slope*x[-1] + intercept
+    if current <= target:
+        return (float(slope), 0)
+    if slope >= 0.:
+        return (float(slope), -1)
+    return (float(slope), int(numpy.ceil((target - current) / slope)))
+
 
+def _write_csv(filename, names, columns):
+    """ Write `columns` to `filename` in a single operation. """
+    nrows = min([len(column) for column in columns])
+    data = numpy.column_stack([column[:nrows] for column in columns])
+    numpy.savetxt(filename, data, fmt='%g', delimiter=', ',
+                  header=', '.join(names), comments='')
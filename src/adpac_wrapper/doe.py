@@ -0,0 +1,162 @@
+"""
+Batch generation of case variants from a single parsed template.
+The template ``.input`` and ``.boundata`` files are parsed once per process,
+then for each case only the specified variables are modified before the
+files are written (unmodified BCs are not re-formatted). Output is identical
+to modifying the template and calling :meth:`Input.write` and
+:meth:`Boundata.write`.
+"""
+
+import multiprocessing
+import os.path
+
+import numpy
+
+from adpac_wrapper.boundata import Boundata
+from adpac_wrapper.input import Input
+
+# Template used by pool worker processes, see _init_worker().
+_TEMPLATE = None
+
+
+class CaseGenerator(object):
+    """
+    Generates case variants from template ``<casename>.input`` and
+    ``<casename>.boundata``.
+
+    `columns` specifies the variable set by each column of the parameter
+    matrix passed to :meth:`generate`. Each column is a path such as
+    ``'input.cfl'`` (or just ``'cfl'``) or ``'boundata.BC_12.pexit'``, or for
+    per-block input variables a ``(path, index)`` tuple such as
+    ``('input.rpm', 2)``, with `index` starting at 0.
+    """
+
+    def __init__(self, casename, columns):
+        self.casename = os.path.abspath(casename)
+        self.columns = list(columns)
+        self._template = _Template(self.casename, self.columns)  # Validate.
+
+    def generate(self, matrix, directories, processes=None):
+        """
+        Write a case for each row of `matrix` to the corresponding entry of
+        `directories` (created if necessary). Case files are named after the
+        template. If `processes` is 1, cases are written by this process,
+        otherwise by a pool of `processes` workers (default CPU count).
+        """
+        matrix = numpy.asarray(matrix)
+        if matrix.ndim != 2 or matrix.shape[1] != len(self.columns):
+            raise ValueError('matrix shape %s does not match %d columns'
+                             % (matrix.shape, len(self.columns)))
+        if len(directories) != len(matrix):
+            raise ValueError('%d directories for %d cases'
+                             % (len(directories), len(matrix)))
+
+        tasks = [(os.path.abspath(directory), row)
+                 for directory, row in zip(directories, matrix.tolist())]
+        if processes is None:
+            processes = multiprocessing.cpu_count()
+        if processes == 1 or len(tasks) < 2:
+            for directory, row in tasks:
+                self._template.write(directory, row)
+            return
+
+        processes = min(processes, len(tasks))
+        pool = multiprocessing.Pool(processes, _init_worker,
+                                    (self.casename, self.columns))
+        try:
+            pool.map(_write_case, tasks,
+                     max(1, len(tasks) // (processes * 4)))
+        finally:
+            pool.close()
+            pool.join()
+
+
+class _Template(object):
+    """ Parsed template and resolved columns. """
+
+    def __init__(self, casename, columns):
+        self.name = os.path.basename(casename)
+        self.input = Input()
+        self.input.read(casename)
+        self.boundata = Boundata()
+        self.boundata.read(casename, self.input)
+        self._columns = [self._resolve(column) for column in columns]
+        self._base = [self._get(column) for column in self._columns]
+
+    def _resolve(self, column):
+        """ Return ``(obj, name, block)`` for `column`. """
+        if isinstance(column, tuple):
+            path, index = column
+            block = index + 1
+        else:
+            path, block = column, None
+
+        names = path.split('.')
+        if names[0] == 'input':
+            names = names[1:]
+        obj = self.input
+        if names[0] == 'boundata':
+            obj = self.boundata
+            names = names[1:]
+        try:
+            for name in names[:-1]:
+                obj = getattr(obj, name)
+        except AttributeError:
+            raise ValueError('column %r: %r not found' % (column, name))
+        name = names[-1]
+        if obj.trait(name) is None:
+            raise ValueError('column %r: %r not found' % (column, name))
+
+        column = (obj, name, block)
+        try:
+            value = self._get(column)
+        except (IndexError, ValueError) as exc:
+            raise ValueError('column %r: %s' % (path, exc))
+        if isinstance(value, (list, numpy.ndarray)):
+            raise ValueError('column %r: per-block variable requires an index'
+                             % path)
+        return column
+
+    def _get(self, column):
+        """ Return value of `column`. """
+        obj, name, block = column
+        if block is None:
+            return getattr(obj, name)
+        return obj.get_per_block(name, block)
+
+    def _set(self, column, value):
+        """ Set `column` to `value`. """
+        obj, name, block = column
+        if block is None:
+            current = getattr(obj, name)
+            if isinstance(current, (bool, int)):
+                value = type(current)(value)
+            setattr(obj, name, value)
+        else:
+            obj.set_per_block(name, value, block)
+
+    def write(self, directory, row):
+        """ Write case with column values `row` to `directory`. """
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        casename = os.path.join(directory, self.name)
+        try:
+            for column, value in zip(self._columns, row):
+                self._set(column, value)
+            self.input.write(casename)
+            self.boundata.write(casename, self.input)
+        finally:
+            for column, value in zip(self._columns, self._base):
+                self._set(column, value)
+
+
+def _init_worker(casename, columns):
+    """ Parse template for this worker process. """
+    global _TEMPLATE
+    _TEMPLATE = _Template(casename, columns)
+
+
+def _write_case(task):
+    """ Write case `task` (``(directory, row)``) using worker template. """
+    _TEMPLATE.write(*task)
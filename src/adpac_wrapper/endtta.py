@@ -1,7 +1,7 @@
 from openmdao.lib.datatypes.api import Int, Float
 
 from adpac_wrapper.bc import BC
-from adpac_wrapper.boundata import register, INPUT
+from adpac_wrapper.boundata import register, default_input
 
 
 class EndTTA(BC):
@@ -21,7 +21,7 @@ class EndTTA(BC):
         """
         if input_ref is None:
             self._logger.warning('Using default reference values.')
-            input_ref = INPUT
+            input_ref = default_input()
 
         super(EndTTA, self).read(tokens, inp, input_ref)
 
@@ -53,7 +53,7 @@ class EndTTA(BC):
         """
         if input_ref is None:
             self._logger.warning('Using default reference values.')
-            input_ref = INPUT
+            input_ref = default_input()
 
         out.write('\n')
         super(EndTTA, self).write(out, count, input_ref)
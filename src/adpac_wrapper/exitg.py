@@ -1,7 +1,7 @@
 from openmdao.lib.datatypes.api import Float
 
 from adpac_wrapper.bc import BC
-from adpac_wrapper.boundata import register, INPUT
+from adpac_wrapper.boundata import register, default_input
 
 
 class ExitG(BC):
@@ -24,7 +24,7 @@ class ExitG(BC):
         """
         if input_ref is None:
             self._logger.warning('Using default reference values.')
-            input_ref = INPUT
+            input_ref = default_input()
 
         super(ExitG, self).read(tokens, inp, input_ref)
 
@@ -60,7 +60,7 @@ class ExitG(BC):
         """
         if input_ref is None:
             self._logger.warning('Using default reference values.')
-            input_ref = INPUT
+            input_ref = default_input()
 
         out.write('\n')
         super(ExitG, self).write(out, count, input_ref)
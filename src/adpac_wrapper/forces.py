@@ -0,0 +1,119 @@
+import os.path
+import re
+
+import numpy
+
+from openmdao.main.api import Container
+from openmdao.lib.datatypes.api import Array
+
+# Define units we need.
+from adpac_wrapper.local_units import add_units
+add_units()
+
+# Data lines start with a number, anything else is header/comment text.
+_DATA_RE = re.compile(r'^[ \t]*[-+]?[0-9].*$', re.MULTILINE)
+
+# Columns of ``<casename>.forces``.
+_FORCES_COLUMNS = (
+    ('block', int),
+    ('fx', float),
+    ('fy', float),
+    ('fz', float),
+    ('mx', float),
+    ('my', float),
+    ('mz', float),
+)
+
+# Additional columns written for rotating blocks with ``irevs`` set.
+_IREVS_COLUMNS = (
+    ('rpm', float),
+    ('power', float),
+)
+
+
+class Forces(Container):
+    """
+    Processes the ADPAC ``<casename>.forces`` output file.
+
+    Data lines are expected to have the column layout::
+
+        block  fx  fy  fz  mx  my  mz
+
+    With ``irevs`` set, ADPAC also reports rotating blocks, and each data
+    line has two more columns (zero for non-rotating blocks)::
+
+        block  fx  fy  fz  mx  my  mz  rpm  power
+
+    Lines not starting with a number are ignored. Fortran ``D`` exponents
+    are accepted. If a block is reported more than once (force history) the
+    last values are used. Outputs are ordered by block number. Forces are in
+    lbf and moments in ft*lbf. `rpm` and `power` are only set for the
+    ``irevs`` layout. A file with any other layout or with non-numeric
+    values (such as overflowed ``******`` fields) is logged as a warning
+    and the outputs are left empty.
+    """
+
+    block = Array(dtype=int, iotype='out',
+                  desc='Block number.')
+    fx = Array(dtype=float, units='lbf', iotype='out',
+               desc='Force in X direction.')
+    fy = Array(dtype=float, units='lbf', iotype='out',
+               desc='Force in Y direction.')
+    fz = Array(dtype=float, units='lbf', iotype='out',
+               desc='Force in Z direction.')
+    mx = Array(dtype=float, units='ft*lbf', iotype='out',
+               desc='Moment about X axis.')
+    my = Array(dtype=float, units='ft*lbf', iotype='out',
+               desc='Moment about Y axis.')
+    mz = Array(dtype=float, units='ft*lbf', iotype='out',
+               desc='Moment about Z axis.')
+    rpm = Array(dtype=float, units='rpm', iotype='out',
+                desc='Block rotational speed (irevs layout only).')
+    power = Array(dtype=float, units='hp', iotype='out',
+                  desc='Power absorbed by block (irevs layout only).')
+
+    def clear(self):
+        """ Clear data. """
+        for name, typ in _FORCES_COLUMNS + _IREVS_COLUMNS:
+            setattr(self, name, numpy.zeros(0, dtype=typ))
+
+    def read(self, casename):
+        """ Read ``<casename>.forces`` data. """
+        self.clear()
+
+        filename = casename+'.forces'
+        if not os.path.exists(filename):
+            return
+
+        with open(filename, 'rU') as inp:
+            text = inp.read()
+
+        # Parse all data lines in one operation.
+        lines = _DATA_RE.findall(text)
+        if not lines:
+            return
+        tokens = ' '.join(lines).replace('D', 'E').replace('d', 'e').split()
+        ncols = len(lines[0].split())
+        if ncols == len(_FORCES_COLUMNS):
+            columns = _FORCES_COLUMNS
+        elif ncols == len(_FORCES_COLUMNS) + len(_IREVS_COLUMNS):
+            columns = _FORCES_COLUMNS + _IREVS_COLUMNS
+        else:
+            columns = None
+        if columns is None or len(tokens) % ncols:
+            self._logger.warning('%s: unexpected number of columns,'
+                                 ' ignoring data.', filename)
+            return
+        try:
+            data = numpy.array(tokens, dtype=float).reshape((-1, ncols))
+        except ValueError as exc:
+            self._logger.warning('%s: %s, ignoring data.', filename, exc)
+            return
+
+        # Last record for each block, in block order.
+        blocks = data[:, 0].astype(int)
+        unique, index = numpy.unique(blocks[::-1], return_index=True)
+        data = data[len(blocks)-1-index]
+
+        for i, (name, typ) in enumerate(columns):
+            setattr(self, name, data[:, i].astype(typ))
@@ -1,7 +1,7 @@
 from openmdao.lib.datatypes.api import Float
 
 from adpac_wrapper.bc import BC
-from adpac_wrapper.boundata import register, INPUT
+from adpac_wrapper.boundata import register, default_input
 
 
 class Free(BC):
@@ -23,7 +23,7 @@ class Free(BC):
         """
         if input_ref is None:
             self._logger.warning('Using default reference values.')
-            input_ref = INPUT
+            input_ref = default_input()
 
         super(Free, self).read(tokens, inp, input_ref)
 
@@ -56,7 +56,7 @@ class Free(BC):
         """
         if input_ref is None:
             self._logger.warning('Using default reference values.')
-            input_ref = INPUT
+            input_ref = default_input()
 
         out.write('\n')
         super(Free, self).write(out, count, input_ref)
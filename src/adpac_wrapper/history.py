@@ -0,0 +1,141 @@
+"""
+Bounded-memory storage for long sample series such as convergence histories.
+"""
+
+import numpy
+
+# History policies.
+POLICIES = ('all', 'tail', 'decimated')
+
+
+class History(object):
+    """
+    Records rows of `ncols` float samples.
+
+    `policy` selects what is retained:
+
+    - 'all' keeps every row.
+    - 'tail' keeps the last `size` rows in a fixed-size ring buffer.
+    - 'decimated' keeps the tail plus rows 0, 1, 2, 4, 8, ... \
+      (log-spaced, so at most 64 extra rows).
+
+    For 'all', rows are stored in a buffer whose capacity is doubled as
+    needed, so appending is amortised O(rows appended).
+
+    Regardless of policy, per-column statistics are exact: `last`, `min`,
+    `max`, and the moving average over the last `window` rows (the tail is
+    never smaller than `window`).
+    """
+
+    def __init__(self, ncols, policy='all', size=1000, window=100):
+        if policy not in POLICIES:
+            raise ValueError('policy (%s) must be one of %s'
+                             % (policy, POLICIES))
+        self.ncols = ncols
+        self.policy = policy
+        self.window = window
+        self.count = 0  # Total number of rows appended.
+        self.last = numpy.zeros(ncols)
+        self.min = numpy.zeros(ncols)
+        self.max = numpy.zeros(ncols)
+
+        if policy == 'all':
+            self._data = numpy.zeros((0, ncols))
+        else:
+            self._ring = numpy.zeros((max(size, window), ncols))
+            self._decimated = []   # (row index, row).
+
+    def __len__(self):
+        """ Number of rows retained. """
+        if self.policy == 'all':
+            return self.count
+        return min(self.count, len(self._ring)) + \
+               len(self._retained_decimated())
+
+    def append(self, block):
+        """ Append rows from 2D array `block`. """
+        block = numpy.asarray(block, dtype=float).reshape((-1, self.ncols))
+        nrows = len(block)
+        if not nrows:
+            return
+
+        if self.count:
+            self.min = numpy.minimum(self.min, block.min(axis=0))
+            self.max = numpy.maximum(self.max, block.max(axis=0))
+        else:
+            self.min = block.min(axis=0)
+            self.max = block.max(axis=0)
+        self.last = block[-1].copy()
+
+        if self.policy == 'all':
+            self._grow(block)
+        else:
+            if self.policy == 'decimated':
+                index = 0
+                while index < self.count + nrows:
+                    if index >= self.count:
+                        self._decimated.append(
+                            (index, block[index-self.count].copy()))
+                    index = index*2 if index else 1
+            self._put(block)
+        self.count += nrows
+
+    def _grow(self, block):
+        """ Append `block` to buffer, doubling capacity if necessary. """
+        needed = self.count + len(block)
+        if needed > len(self._data):
+            data = numpy.zeros((max(needed, 2*len(self._data)), self.ncols))
+            data[:self.count] = self._data[:self.count]
+            self._data = data
+        self._data[self.count:needed] = block
+
+    def _put(self, block):
+        """ Write `block` to ring buffer. """
+        capacity = len(self._ring)
+        start = self.count
+        if len(block) > capacity:
+            start += len(block) - capacity
+            block = block[-capacity:]
+        start %= capacity
+        first = min(len(block), capacity - start)
+        self._ring[start:start+first] = block[:first]
+        self._ring[:len(block)-first] = block[first:]
+
+    def _tail(self):
+        """ Return tail rows in order. """
+        capacity = len(self._ring)
+        if self.count <= capacity:
+            return self._ring[:self.count]
+        start = self.count % capacity
+        return numpy.concatenate((self._ring[start:], self._ring[:start]))
+
+    def _retained_decimated(self):
+        """ Return decimated rows preceding the tail. """
+        if self.policy != 'decimated':
+            return []
+        first_tail = self.count - min(self.count, len(self._ring))
+        return [row for index, row in self._decimated if index < first_tail]
+
+    def rows(self):
+        """
+        Return 2D array of retained rows in order. For 'all' this is a view
+        of the buffer, which must not be modified.
+        """
+        if self.policy == 'all':
+            return self._data[:self.count]
+
+        tail = self._tail()
+        decimated = self._retained_decimated()
+        if decimated:
+            return numpy.concatenate((numpy.array(decimated), tail))
+        return tail.copy()
+
+    def average(self):
+        """ Return moving average of each column over the last `window`. """
+        if not self.count:
+            return numpy.zeros(self.ncols)
+        if self.policy == 'all':
+            tail = self.rows()[-self.window:]
+        else:
+            tail = self._tail()[-self.window:]
+        return tail.mean(axis=0)
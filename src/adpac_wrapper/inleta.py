@@ -1,7 +1,7 @@
 from openmdao.lib.datatypes.api import Float
 
 from adpac_wrapper.bc import BC
-from adpac_wrapper.boundata import register, INPUT
+from adpac_wrapper.boundata import register, default_input
 
 
 class InletA(BC):
@@ -22,7 +22,7 @@ class InletA(BC):
         """
         if input_ref is None:
             self._logger.warning('Using default reference values.')
-            input_ref = INPUT
+            input_ref = default_input()
 
         super(InletA, self).read(tokens, inp, input_ref)
 
@@ -54,7 +54,7 @@ class InletA(BC):
         """
         if input_ref is None:
             self._logger.warning('Using default reference values.')
-            input_ref = INPUT
+            input_ref = default_input()
 
         out.write('\n')
         super(InletA, self).write(out, count, input_ref)
@@ -1,7 +1,7 @@
 from openmdao.lib.datatypes.api import Float
 
 from adpac_wrapper.bc import BC
-from adpac_wrapper.boundata import register, INPUT
+from adpac_wrapper.boundata import register, default_input
 
 
 class InletG(BC):
@@ -25,7 +25,7 @@ class InletG(BC):
         """
         if input_ref is None:
             self._logger.warning('Using default reference values.')
-            input_ref = INPUT
+            input_ref = default_input()
 
         super(InletG, self).read(tokens, inp, input_ref)
 
@@ -63,7 +63,7 @@ class InletG(BC):
         """
         if input_ref is None:
             self._logger.warning('Using default reference values.')
-            input_ref = INPUT
+            input_ref = default_input()
 
         out.write('\n')
         super(InletG, self).write(out, count, input_ref)
@@ -1,7 +1,7 @@
 from openmdao.lib.datatypes.api import Float
 
 from adpac_wrapper.bc import BC
-from adpac_wrapper.boundata import register, INPUT
+from adpac_wrapper.boundata import register, default_input
 
 
 class InletM(BC):
@@ -19,7 +19,7 @@ class InletM(BC):
         """
         if input_ref is None:
             self._logger.warning('Using default reference values.')
-            input_ref = INPUT
+            input_ref = default_input()
 
         super(InletM, self).read(tokens, inp, input_ref)
 
@@ -47,7 +47,7 @@ class InletM(BC):
         """
         if input_ref is None:
             self._logger.warning('Using default reference values.')
-            input_ref = INPUT
+            input_ref = default_input()
 
         out.write('\n')
         super(InletM, self).write(out, count, input_ref)
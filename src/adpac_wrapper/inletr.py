@@ -1,8 +1,7 @@
-from openmdao.main.api import Container
 from openmdao.lib.datatypes.api import Float
 
-from adpac_wrapper.bc import BC
-from adpac_wrapper.boundata import register, INPUT
+from adpac_wrapper.bc import BC, BCData
+from adpac_wrapper.boundata import register, default_input
 
 
 class InletR(BC):
@@ -24,7 +23,7 @@ class InletR(BC):
         """
         if input_ref is None:
             self._logger.warning('Using default reference values.')
-            input_ref = INPUT
+            input_ref = default_input()
 
         super(InletR, self).read(tokens, inp, input_ref)
 
@@ -73,7 +72,7 @@ class InletR(BC):
         """
         if input_ref is None:
             self._logger.warning('Using default reference values.')
-            input_ref = INPUT
+            input_ref = default_input()
 
         out.write('\n')
         super(InletR, self).write(out, count, input_ref)
@@ -88,7 +87,7 @@ register('INLETR', InletR)
 register('INL2DR', InletR)
 
 
-class InletR_data(Container):
+class InletR_data(BCData):
     """ Inflow data for :class:`InletR`. """
 
     axial = Float(units='ft', iotype='in', desc='Axial coordinate.')
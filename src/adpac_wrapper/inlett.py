@@ -1,8 +1,7 @@
-from openmdao.main.api import Container
 from openmdao.lib.datatypes.api import Float
 
-from adpac_wrapper.bc import BC
-from adpac_wrapper.boundata import register, INPUT
+from adpac_wrapper.bc import BC, BCData
+from adpac_wrapper.boundata import register, default_input
 
 
 class InletT(BC):
@@ -24,7 +23,7 @@ class InletT(BC):
         """
         if input_ref is None:
             self._logger.warning('Using default reference values.')
-            input_ref = INPUT
+            input_ref = default_input()
 
         super(InletT, self).read(tokens, inp, input_ref)
 
@@ -73,7 +72,7 @@ class InletT(BC):
         """
         if input_ref is None:
             self._logger.warning('Using default reference values.')
-            input_ref = INPUT
+            input_ref = default_input()
 
         out.write('\n')
         super(InletT, self).write(out, count, input_ref)
@@ -89,7 +88,7 @@ register('INL2DT', InletT)
 register('INLETX', InletT)
 
 
-class InletT_data(Container):
+class InletT_data(BCData):
     """ Inflow data for :class:`InletT`. """
 
     rad = Float(units='ft', low=0., iotype='in', desc='Radial coordinate.')
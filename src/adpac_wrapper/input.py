@@ -1,29 +1,38 @@
-import fileinput
 import os.path
 import re
 import sys
 
+import numpy
+
 from openmdao.main.api import Container
-from openmdao.lib.datatypes.api import Bool, Float, Int, List, Str
+from openmdao.lib.datatypes.api import Array, Bool, Float, Int, List, Str
+
+from adpac_wrapper.cache import decode_values, encode_values, \
+                                trait_values
+from adpac_wrapper.util import write_if_changed
 
 # Define units we need.
 from adpac_wrapper.local_units import add_units
 add_units()
 
 
-# Line formats:
-# <whitespace><#EOF> : end-of-file.
+# Line formats (matched by a single pattern applied to the whole file):
+# <whitespace><#EOF> or <whitespace><ENDINPUT> (anything following) :
+#     end-of-file.
 # <whitespace><#> : comment.
-# <whitespace><name><whitespace><=><whitespace><value> : assignment.
-_EOF_RE = re.compile(r'[ \t]*#EOF')
-_COMMENT_RE = re.compile(r'([ \t]*#)|([ \t]*$)')
-_LINE_RE = re.compile(r'[ \t]*([a-zA-Z0-9()]+)[ \t]+=[ \t]+([_a-zA-Z0-9.\-+]+)')
-
-# Name formats:
-# <alphanum><(><digits><)> : array.
-# <alphanum> : scalar.
-_ARRAY_RE = re.compile(r'([a-zA-Z][a-zA-Z0-9]*)\(([1-9][0-9]*)\)$')
-_SCALAR_RE = re.compile(r'([a-zA-Z][a-zA-Z0-9]*)$')
+# <whitespace><name><whitespace><=><whitespace><value> : assignment,
+# where <name> is <alphanum> (scalar) or <alphanum><(><digits><)> (array).
+# Anything else is an error.
+_LINE_RE = re.compile(r'^[ \t]*(?:'
+                      r'(?P<eof>#EOF|ENDINPUT).*|'
+                      r'(?P<comment>#.*|)|'
+                      r'(?P<name>[a-zA-Z][a-zA-Z0-9]*)'
+                      r'(?:\((?P<index>[1-9][0-9]*)\))?'
+                      r'[ \t]+=[ \t]+(?P<value>[_a-zA-Z0-9.\-+]+).*|'
+                      r'(?P<bad>.*))$', re.MULTILINE)
+
+# Variables not read from or written to the file.
+_NOT_IN_FILE = ('header_lines', 'write_defaults')
 
 # Special per-block variables.
 _PER_BLOCK_VARS = (
@@ -42,10 +51,55 @@ _PER_BLOCK_VARS = (
     'wbf'
 )
 
+# Per-block variables with string values (lists), others are numeric arrays.
+_PER_BLOCK_STRINGS = ('bffile', 'lofile', 'rvtfile', 'tplfile')
+_PER_BLOCK_NUMERIC = tuple([name for name in _PER_BLOCK_VARS
+                            if name not in _PER_BLOCK_STRINGS])
+
+
+class InputPatch(object):
+    """
+    Differences between two :class:`Input` instances, returned by
+    :meth:`Input.diff` and applied by :meth:`Input.apply`.
+    `scalars` maps variable name to new value, `per_block` maps per-block
+    variable name to ``(blocks, values)``, and `nblocks` is the new number
+    of blocks (None if unchanged).
+    """
+
+    def __init__(self, scalars, per_block, nblocks):
+        self.scalars = scalars
+        self.per_block = per_block
+        self.nblocks = nblocks
+
+    def __len__(self):
+        count = len(self.scalars)
+        for blocks, values in self.per_block.values():
+            count += len(blocks)
+        if self.nblocks is not None:
+            count += 1
+        return count
+
+    def __repr__(self):
+        return 'InputPatch(%r, %r, %r)' \
+               % (self.scalars, self.per_block, self.nblocks)
+
+    def names(self):
+        """ Return sorted list of modified variable names. """
+        return sorted(self.scalars.keys() + self.per_block.keys())
+
 
 class Input(Container):
     """ ADPAC input file handling. """
 
+    # Maps variable name to value conversion (built on first use).
+    _lookup = None
+
+    # Precompiled output template (built on first use).
+    _template = None
+
+    # Names of numeric and other scalar variables (built on first use).
+    _layout = None
+
     casename = Str('', iotype='in',
                    desc='Base name of related files.')
     ccp = Float(1.6, low=1.0, high=1.8, iotype='in',
@@ -286,32 +340,32 @@ class Input(Container):
                  desc='Z-coordinate of moment component.')
 
     # Per-block variables.
-    advr = List(iotype='in',
-                desc='Block rotational speed in terms of an advance ratio.')
+    advr = Array(dtype=float, iotype='in',
+                 desc='Block rotational speed in terms of an advance ratio.')
     bffile = List(iotype='in',
                   desc='File for block blade blockage and body force terms.')
-    dfactc = List(iotype='in',
-                  desc='Diffusion factor.')
-    fcarb = List(iotype='in',
-                 desc='Cartesian/cylindrical coordinates (-1 => unset).')
-    flive = List(iotype='in',
-                 desc='Undocumented.')
-    fturbcht = List(iotype='in',
-                    desc='Use C/O-grid heat transfer turbulence model.')
+    dfactc = Array(dtype=int, iotype='in',
+                   desc='Diffusion factor.')
+    fcarb = Array(dtype=int, iotype='in',
+                  desc='Cartesian/cylindrical coordinates (-1 => unset).')
+    flive = Array(dtype=float, iotype='in',
+                  desc='Undocumented.')
+    fturbcht = Array(dtype=int, iotype='in',
+                     desc='Use C/O-grid heat transfer turbulence model.')
     lofile = List(iotype='in',
                   desc='Loss coefficient file.')
-    nbld = List(iotype='in',
-                desc='Number of blades in block.')
-    nsl = List(iotype='in',
-               desc='Number of streamlines for k-R turbulence model.')
-    rpm = List(units='rpm', iotype='in',
-               desc='Rotational speed of mesh block.')
+    nbld = Array(dtype=int, iotype='in',
+                 desc='Number of blades in block.')
+    nsl = Array(dtype=int, iotype='in',
+                desc='Number of streamlines for k-R turbulence model.')
+    rpm = Array(dtype=float, units='rpm', iotype='in',
+                desc='Rotational speed of mesh block.')
     rvtfile = List(iotype='in',
                    desc='Imposed rVtheta distribution.')
     tplfile = List(iotype='in',
                    desc='Total pressure loss profile.')
-    wbf = List(iotype='in',
-               desc='Write body force file.')
+    wbf = Array(dtype=int, iotype='in',
+                desc='Write body force file.')
 
     # Misc.
     header_lines = List(iotype='in',
@@ -323,6 +377,8 @@ class Input(Container):
     def __init__(self, *args, **kwargs):
         super(Input, self).__init__(*args, **kwargs)
         self._max_blocks = 0  # Maximum number of blocks we know about.
+        self._text = None     # (key, text) last generated by write().
+        self._vector = None   # Numeric scalar values, see _scalar_vector().
 
         # Scalar defaults:
 #TODO: there should be a cleaner way to do this.
@@ -345,30 +401,197 @@ class Input(Container):
         self._defaults['rvtfile'] = 'default_file_name'
         self._defaults['tplfile'] = 'default_file_name'
         self._defaults['wbf'] = 0
+        for name in _PER_BLOCK_VARS:
+            setattr(self, name, self._default_per_block(name, 0))
 
     def create_per_block_vars(self, new_max):
         """ Create all per-block variables up to `new_max`. """
-        for i in range(self._max_blocks, new_max):
-            for name in _PER_BLOCK_VARS:
-                getattr(self, name).append(self._defaults[name])
-        self._max_blocks = new_max
+        if new_max > self._max_blocks:
+            self._resize(new_max)
+
+    def _resize(self, nblocks):
+        """
+        Set number of blocks to `nblocks`, truncating or extending (with
+        defaults) all per-block variables.
+        """
+        self._max_blocks = nblocks
+        for name in _PER_BLOCK_VARS:
+            values = getattr(self, name)
+            if len(values) > nblocks:
+                setattr(self, name, values[:nblocks])
+            elif len(values) < nblocks:
+                extra = self._default_per_block(name, nblocks-len(values))
+                if name in _PER_BLOCK_STRINGS:
+                    setattr(self, name, list(values) + extra)
+                else:
+                    setattr(self, name, numpy.concatenate((values, extra)))
+
+    def _default_per_block(self, name, nblocks):
+        """ Return `nblocks` default values for per-block variable `name`. """
+        default = self._defaults[name]
+        if name in _PER_BLOCK_STRINGS:
+            return [default] * nblocks
+        values = numpy.empty(nblocks, dtype=type(default))
+        values.fill(default)
+        return values
+
+    def get_per_block(self, name, blocks=None):
+        """
+        Return values of per-block variable `name` for `blocks` (block
+        numbers, starting at 1). `blocks` may be a single block number, a
+        sequence, or None for all blocks.
+        """
+        values = getattr(self, name)[:self._max_blocks]
+        if blocks is None:
+            return list(values) if name in _PER_BLOCK_STRINGS \
+                                else values.copy()
+        index = self._block_index(name, blocks)
+        if numpy.ndim(index) == 0:
+            return values[index]
+        if name in _PER_BLOCK_STRINGS:
+            return [values[i] for i in index]
+        return values[index]
+
+    def set_per_block(self, name, values, blocks=None):
+        """
+        Set per-block variable `name` to `values` for `blocks` (block
+        numbers, starting at 1). `blocks` may be a single block number, a
+        sequence, or None. If None and `values` is a sequence, blocks
+        ``1..len(values)`` are set, otherwise all current blocks are set.
+        Per-block variables are extended as necessary.
+        """
+        if blocks is None:
+            if numpy.ndim(values) == 0:
+                blocks = range(1, self._max_blocks+1)
+            else:
+                blocks = range(1, len(values)+1)
+        index = self._block_index(name, blocks, extend=True)
+
+        if name in _PER_BLOCK_STRINGS:
+            new = list(getattr(self, name))
+            if numpy.ndim(index) == 0:
+                new[index] = values
+            else:
+                if numpy.ndim(values) == 0:
+                    values = [values] * len(index)
+                elif len(values) != len(index):
+                    self.raise_exception('%s: %d values for %d blocks'
+                                         % (name, len(values), len(index)),
+                                         ValueError)
+                for i, value in zip(index, values):
+                    new[i] = value
+        else:
+            new = getattr(self, name).copy()
+            try:
+                new[index] = values
+            except ValueError as exc:
+                self.raise_exception('%s: %s' % (name, exc), ValueError)
+        setattr(self, name, new)
+
+    def _block_index(self, name, blocks, extend=False):
+        """
+        Return zero-origin index (scalar or array) corresponding to `blocks`
+        for per-block variable `name`. If `extend`, per-block variables are
+        created as necessary, otherwise blocks must exist.
+        """
+        if name not in _PER_BLOCK_VARS:
+            self.raise_exception("'%s' is not a per-block variable" % name,
+                                 ValueError)
+        index = numpy.array(blocks, dtype=int) - 1
+        if index.size:
+            if index.min() < 0:
+                self.raise_exception('%s: block numbers start at 1' % name,
+                                     ValueError)
+            last = index.max() + 1
+            if last > self._max_blocks:
+                if extend:
+                    self.create_per_block_vars(last)
+                else:
+                    self.raise_exception('%s: block %d > %d blocks'
+                                         % (name, last, self._max_blocks),
+                                         ValueError)
+        if index.ndim == 0:
+            return int(index)
+        return index
+
+    def diff(self, other):
+        """
+        Return :class:`InputPatch` which transforms this instance into
+        `other`. All numeric values (scalar and per-block) are compared in
+        a single vectorized operation.
+        """
+        numeric, others = self._get_layout()
+        nscalars = len(numeric)
+        nblocks = max(self._max_blocks, other._max_blocks)
+        mine = numpy.concatenate((self._scalar_vector(),
+                                  self._per_block_matrix(nblocks).ravel()))
+        theirs = numpy.concatenate((other._scalar_vector(),
+                                    other._per_block_matrix(nblocks).ravel()))
+
+        scalars = {}
+        changed = {}
+        for i in numpy.flatnonzero(mine != theirs).tolist():
+            if i < nscalars:
+                scalars[numeric[i]] = getattr(other, numeric[i])
+            else:
+                row, block = divmod(i-nscalars, nblocks)
+                if block < other._max_blocks:  # Else truncated.
+                    name = _PER_BLOCK_NUMERIC[row]
+                    changed.setdefault(name, []).append(block)
+
+        for name in others:
+            value = getattr(other, name)
+            if getattr(self, name) != value:
+                scalars[name] = value[:] if isinstance(value, list) else value
+
+        per_block = {}
+        for name, index in changed.items():
+            per_block[name] = ([i+1 for i in index],
+                               getattr(other, name)[index])
+        for name in _PER_BLOCK_STRINGS:
+            old = self._per_block_list(name, nblocks)
+            new = other._per_block_list(name, other._max_blocks)
+            index = [i for i, value in enumerate(new) if value != old[i]]
+            if index:
+                per_block[name] = ([i+1 for i in index],
+                                   [new[i] for i in index])
+
+        if other._max_blocks == self._max_blocks:
+            nblocks = None
+        else:
+            nblocks = other._max_blocks
+        return InputPatch(scalars, per_block, nblocks)
+
+    def apply(self, patch):
+        """ Apply `patch` returned by :meth:`diff`. """
+        for name, value in patch.scalars.items():
+            setattr(self, name, value[:] if isinstance(value, list) else value)
+
+        if patch.nblocks is not None:
+            self._resize(patch.nblocks)
+
+        for name, (blocks, values) in patch.per_block.items():
+            self.set_per_block(name, values, blocks)
 
     def reset_to_defaults(self):
         """ Reset to default values. """
         for name in self._defaults.keys():
             if name in _PER_BLOCK_VARS:
-                setattr(self, name, [])
+                setattr(self, name, self._default_per_block(name, 0))
             else:
                 setattr(self, name, self._defaults[name])
         self._max_blocks = 0
         self.header_lines = []
 
-    def read(self, casename):
+    def read(self, casename, cache=None):
         """
         Read input from ``<casename>.input``.
         Note that unlike ADPAC, unrecognized keywords are treated as an error.
+        If `cache` (a :class:`ParseCache`) is specified, a previously parsed
+        representation of identical file contents is used if available.
         """
         self.reset_to_defaults()
+        self._text = None
 
         filename = casename+'.input'
         if not os.path.exists(filename):
@@ -376,85 +599,121 @@ class Input(Container):
                   % (filename, os.getcwd())
             self.raise_exception(msg, IOError)
 
+        if cache is not None:
+            state = cache.get('input', filename)
+            if state is not None:
+                self._set_state(state)
+                return
+
+        self._parse(filename)
+
+        if cache is not None:
+            cache.put('input', filename, self._get_state())
+
+    def _get_state(self):
+        """ Return cacheable representation of current values. """
+        values = trait_values(self)
+        values['_max_blocks'] = self._max_blocks
+        return encode_values(values)
+
+    def _set_state(self, state):
+        """ Restore values from `state` returned by :meth:`_get_state`. """
+        values = decode_values(state)
+        self._max_blocks = values.pop('_max_blocks')
+        for name, value in values.items():
+            setattr(self, name, value)
+
+    def _parse(self, filename):
+        """ Parse `filename`. """
+        with open(filename, 'rU') as inp:
+            text = inp.read()
+
+        lookup = self._get_lookup()
+        scalars = []
+        per_block = dict([(name, {}) for name in _PER_BLOCK_VARS])
+        nblocks = 0
         errors = 0
         in_header = True
-        inp = fileinput.FileInput(filename, mode='rU')
-        try:
-            for line in inp:
-                if re.match(_EOF_RE, line):
-                    break
-                if re.match(_COMMENT_RE, line):
-                    if in_header:
-                        self.header_lines.append(line)
+        for lineno, match in enumerate(_LINE_RE.finditer(text), 1):
+            start = match.start()
+            if start == len(text):
+                break  # Empty match after final newline.
+            if match.group('eof') is not None:
+                break
+            if match.group('comment') is not None:
+                if in_header:
+                    self.header_lines.append(text[start:match.end()+1])
+                continue
+
+            in_header = False
+            name = match.group('name')
+            if name is None:
+                self._logger.error('line %d: bad format.', lineno)
+                self._logger.error(match.group('bad').rstrip())
+                errors += 1
+                continue
+
+            name = name.lower()
+            index = match.group('index')
+            block_index = -1
+            if index is not None:
+                if name in per_block:
+                    block_index = int(index)
                 else:
-                    in_header = False
-                    match = re.match(_LINE_RE, line)
-                    if match is None:
-                        self._logger.error("line %d: bad format.", inp.lineno())
-                        self._logger.error(line.rstrip())
-                        errors += 1
-                    elif match.group(1).upper == 'ENDINPUT':
-                        break
-                    else:
-                        if not self._process_line(match.group(1),
-                                                  match.group(2), inp.lineno()):
-                            errors += 1
-        finally:
-            inp.close()
+                    name = name+'_'+index  # FDEBUG array.
+            if name not in lookup:
+                # ADPAC would treat this as a comment line.
+                self._logger.error("line %d: '%s' not found.", lineno, name)
+                errors += 1
+                continue
+
+            # Value is represented as a float or a string.
+            value = match.group('value')
+            try:
+                value = float(value)
+            except ValueError:
+                pass  # Keep string value.
+            convert = lookup[name]
+            if convert is not None:
+                value = convert(value)
+
+            if block_index < 0:
+                scalars.append((name, value))
+            else:
+                per_block[name][block_index] = value
+                nblocks = max(nblocks, block_index)
+
+        # Assign values.
+        for name, value in scalars:
+            setattr(self, name, value)
+        if nblocks:
+            self.create_per_block_vars(nblocks)
+            for name, entries in per_block.items():
+                if entries:
+                    self.set_per_block(name, entries.values(), entries.keys())
 
         if errors:
             self.raise_exception("%d errors in '%s'" % (errors, filename),
                                  RuntimeError)
 
-    def _process_line(self, name, value, lineno):
-        """ Process one line's data. """
-        block_index = -1
-        match = re.match(_ARRAY_RE, name)
-        if match is None:
-            if not re.match(_SCALAR_RE, name):
-                self._logger.error("line %d: '%s' bad format.", lineno, name)
-                return False
-        else:
-            # Handle per-block variable, or FDEBUG array.
-            if match.group(1).lower() in _PER_BLOCK_VARS:
-                name = match.group(1)
-                block_index = int(match.group(2))
-            else:
-                name = match.group(1)+'_'+match.group(2)
-
-        name = name.lower()
-        if not hasattr(self, name):
-            # ADPAC would treat this as a comment line.
-            self._logger.error("line %d: '%s' not found.", lineno, name)
-            return False
-
-        # If necessary, extend per-block variables.
-        if block_index > self._max_blocks:
-            self.create_per_block_vars(block_index)
-
-        # Assign value, which is represented as a float or a string.
-        try:
-            float_val = float(value)
-        except ValueError:
-            pass  # Keep string value.
-        else:
-            value = float_val
-
-        if block_index < 0:
-            current = getattr(self, name)
-            if isinstance(current, bool):
-                value = bool(value)
-            elif isinstance(current, int):
-                value = int(value)
-            setattr(self, name, value)
-        else:
-            current = getattr(self, name)[block_index-1]
-            if isinstance(current, bool):
-                value = bool(value)
-            elif isinstance(current, int):
-                value = int(value)
-            getattr(self, name)[block_index-1] = value
-        return True
+    def _get_lookup(self):
+        """
+        Return dictionary mapping each variable which may be read to the
+        function converting a float value to the variable's type (or None).
+        """
+        if Input._lookup is None:
+            lookup = {}
+            for name, value in self._defaults.items():
+                if name in _NOT_IN_FILE:
+                    continue
+                if isinstance(value, bool):
+                    lookup[name] = bool
+                elif isinstance(value, int):
+                    lookup[name] = int
+                else:
+                    lookup[name] = None
+            Input._lookup = lookup
+        return Input._lookup
 
     def check_config(self):
         """ Check sanity of current configuration. """
@@ -473,60 +732,151 @@ class Input(Container):
             self.raise_exception('fsolve=%d requires cfmax <= 2.75' \
                                  % self.fsolve, ValueError)
 
+    def _anytrait_changed(self, name, old, new):
+        """
+        Invalidate generated text and value vector. Assigning a per-block
+        variable with a different number of values sets the number of blocks.
+        """
+        self._text = None
+        self._vector = None
+        if name in _PER_BLOCK_VARS and \
+           len(new) != getattr(self, '_max_blocks', len(new)):
+            self._resize(len(new))
+
     def write(self, casename=None):
-        """ Write input to ``<casename>.input``. """
+        """
+        Write input to ``<casename>.input``. `casename` may include a
+        directory, which is not included in the CASENAME value written.
+        The text is only regenerated if a variable has changed, and the file
+        is only written if its contents would change.
+        """
         casename = casename or self.casename
-        filename = casename+'.input'
-
-        # Get sorted list of variables.
-        varnames = sorted([name for name, var in self.items(iotype='in')])
-
-        with open(filename, 'w') as out:
-            for line in self.header_lines:
-                out.write(line)
-
-            skip = ['header_lines', 'write_defaults']
-            skip.extend(_PER_BLOCK_VARS)
-            for name in varnames:
-                if name in skip:
-                    continue
-
-                value = casename if name == 'casename' else self.get(name)
-                if not self.write_defaults:
-                    # Minimize lines by skipping defaulted values.
-                    if value == self._defaults[name]:
-                        continue
-
-                # If boolean or int, map to float.
-                if isinstance(value, (bool, int)):
-                    value = float(value)
-
+        # Array elements may be modified in place without notification.
+        key = (casename, tuple([getattr(self, name).tostring()
+                                for name in _PER_BLOCK_NUMERIC]))
+        if self._text is None or self._text[0] != key:
+            self._text = (key, self._format(os.path.basename(casename)))
+        write_if_changed(casename+'.input', self._text[1])
+
+    def _format(self, casename):
+        """ Return input text for `casename`. """
+        scalars, per_block = self._get_template()
+        write_defaults = self.write_defaults
+
+        lines = list(self.header_lines)
+        for name, default, fmt in scalars:
+            value = casename if name == 'casename' else getattr(self, name)
+            # Minimize lines by skipping defaulted values.
+            if value == default and not write_defaults:
+                continue
+            # If boolean or int, map to float.
+            if isinstance(value, (bool, int)):
+                value = float(value)
+            lines.append(fmt % value)
+        lines.append('\n')
+
+        if self._max_blocks:
+            # Write per-block variables in groups.
+            nblocks = self._max_blocks
+            for name, default, prefix in per_block:
+                values = getattr(self, name)[:nblocks]
+                if name in _PER_BLOCK_STRINGS:
+                    index = [i for i in range(nblocks)
+                             if values[i] != default or write_defaults]
+                    values = [values[i] for i in index]
+                else:
+                    if write_defaults:
+                        index = range(nblocks)
+                    else:
+                        index = numpy.flatnonzero(values != default).tolist()
+                    values = values[index].astype(float).tolist()
+                if index:
+                    for i, value in zip(index, values):
+                        lines.append('%-10s = %-14s\n'
+                                     % ('%s%d)' % (prefix, i+1), value))
+                    lines.append('\n')
+            lines.append('\n')
+
+        return ''.join(lines)
+
+    def _get_template(self):
+        """
+        Return ``(scalars, per_block)`` output template. `scalars` is a list
+        of ``(name, default, format)`` in output order, with `format`
+        expecting the value. `per_block` is a list of
+        ``(name, default, prefix)`` where `prefix` starts the indexed name.
+        """
+        if Input._template is None:
+            names = sorted([name for name, var in self.items(iotype='in')
+                            if name not in _NOT_IN_FILE and
+                               name not in _PER_BLOCK_VARS])
+            scalars = []
+            for name in names:
                 # Fix FDEBUG array names.
+                fullname = name
                 underscore = name.find('_')
                 if underscore > 0:
-                    name = '%s(%s)' % (name[:underscore], name[underscore+1:])
-               
+                    fullname = '%s(%s)' % (name[:underscore],
+                                           name[underscore+1:])
                 # Limit doc to single line.
-                doc = self.trait(name).desc
-                doc = doc.split('\n')[0]
-                out.write('%-10s = %-14s # %s\n' % (name.upper(), value, doc))
-            out.write('\n')
-
-            if self._max_blocks:
-                # Write per-block variables in groups.
-                for name in _PER_BLOCK_VARS:
-                    written = False
-                    for i in range(self._max_blocks):
-                        value = self.get(name)[i]
-                        if value != self._defaults[name] or self.write_defaults:
-                            fullname = '%s(%d)' % (name.upper(), i+1)
-                            if isinstance(value, (bool, int)):
-                                value = float(value)
-                            out.write('%-10s = %-14s\n' % (fullname, value))
-                            written = True
-                    if written:
-                        out.write('\n')
-                out.write('\n')
+                doc = self.trait(name).desc.split('\n')[0]
+                fmt = '%-10s = %%-14s # %s\n' % (fullname.upper(),
+                                                 doc.replace('%', '%%'))
+                scalars.append((name, self._defaults[name], fmt))
+
+            per_block = []
+            for name in _PER_BLOCK_VARS:
+                per_block.append((name, self._defaults[name],
+                                  name.upper()+'('))
+            Input._template = (scalars, per_block)
+        return Input._template
+
+    def _get_layout(self):
+        """
+        Return ``(numeric, others)``, lists of the names of scalar variables
+        with numeric values and of the remaining variables to be compared
+        by :meth:`diff`.
+        """
+        if Input._layout is None:
+            numeric = []
+            others = ['header_lines']
+            for name, default, fmt in self._get_template()[0]:
+                if isinstance(default, (bool, int, float)):
+                    numeric.append(name)
+                else:
+                    others.append(name)
+            Input._layout = (numeric, others)
+        return Input._layout
+
+    def _scalar_vector(self):
+        """ Return numeric scalar values as a float array. """
+        if self._vector is None:
+            numeric, others = self._get_layout()
+            self._vector = numpy.array([getattr(self, name)
+                                        for name in numeric], dtype=float)
+        return self._vector
+
+    def _per_block_matrix(self, nblocks):
+        """
+        Return numeric per-block values for `nblocks` blocks (padded with
+        defaults) as a float array of shape ``(variables, nblocks)``.
+        """
+        matrix = numpy.empty((len(_PER_BLOCK_NUMERIC), nblocks))
+        nvalues = min(nblocks, self._max_blocks)
+        for i, name in enumerate(_PER_BLOCK_NUMERIC):
+            matrix[i, :nvalues] = getattr(self, name)[:nvalues]
+            matrix[i, nvalues:] = self._defaults[name]
+        return matrix
+
+    def _per_block_list(self, name, nblocks):
+        """
+        Return string per-block values for `nblocks` blocks (padded with
+        defaults) as a list.
+        """
+        values = list(getattr(self, name)[:nblocks])
+        if len(values) < nblocks:
+            values.extend(self._default_per_block(name, nblocks-len(values)))
+        return values
 
 
 def main():  # pragma no cover
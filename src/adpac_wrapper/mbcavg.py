@@ -1,7 +1,6 @@
-from openmdao.main.api import Container
 from openmdao.lib.datatypes.api import Int, Str
 
-from adpac_wrapper.bc import BC
+from adpac_wrapper.bc import BC, BCData
 from adpac_wrapper.boundata import register
 
 
@@ -84,7 +83,7 @@ class MBCAvg(BC):
 register('MBCAVG', MBCAvg)
 
 
-class MBCAvg_seg(Container):
+class MBCAvg_seg(BCData):
     """ :class:`MBCAvg` segment data. """
 
     lblock2b = Int(low=1, desc='Sending block.')
@@ -0,0 +1,187 @@
+"""
+Support for doing work while ADPAC runs.  A :class:`RunMonitor` thread polls
+a set of :class:`MonitorTask` objects until the solver exits.
+"""
+
+import os.path
+import threading
+
+from adpac_wrapper.scan import Scanner, ScanResult
+
+
+class MonitorTask(object):
+    """ Base class for work performed periodically while ADPAC runs. """
+
+    def start(self):
+        """ Called before ADPAC is started. """
+        pass
+
+    def poll(self):
+        """ Called every poll interval while ADPAC runs. """
+        pass
+
+    def finish(self):
+        """ Called once after ADPAC has exited. """
+        pass
+
+
+class CallbackTask(MonitorTask):
+    """
+    Calls `callback` every poll interval and, if `final`, once more after
+    ADPAC exits.
+    """
+
+    def __init__(self, callback, final=True):
+        self.callback = callback
+        self.final = final
+
+    def poll(self):
+        """ Call `callback`. """
+        self.callback()
+
+    def finish(self):
+        """ Call `callback` to process any final data. """
+        if self.final:
+            self.callback()
+
+
+class FileWatcher(MonitorTask):
+    """
+    Calls `callback` each time `path` is rewritten.  A new version is only
+    reported once its size and modification time have been stable for one
+    poll interval, so partially written files are not processed.
+    """
+
+    def __init__(self, path, callback, logger):
+        self.path = path
+        self.callback = callback
+        self.count = 0  # Number of versions reported.
+        self._logger = logger
+        self._pending = None
+        self._reported = None
+
+    def start(self):
+        """ Forget any previous versions. """
+        self.count = 0
+        self._pending = None
+        self._reported = None
+
+    def poll(self):
+        """ Report `path` if it has changed and is now stable. """
+        try:
+            info = os.stat(self.path)
+        except OSError:
+            return
+        stamp = (info.st_size, info.st_mtime)
+        if stamp == self._reported:
+            return
+        if stamp != self._pending:
+            self._pending = stamp  # Wait one more interval.
+            return
+        self._reported = stamp
+        self.count += 1
+        self._logger.debug('%s: version %d', self.path, self.count)
+        self.callback()
+
+
+class OutputWatchdog(MonitorTask):
+    """
+    Tails text files `filenames` for any of `patterns`.  `callback` is called
+    with the :class:`ScanResult` the first time a pattern is found.
+    Only complete lines are scanned.
+    """
+
+    def __init__(self, filenames, patterns, callback, logger):
+        self.filenames = filenames
+        self.callback = callback
+        self.result = None
+        self.triggered = False
+        self._logger = logger
+        self._scanner = Scanner(patterns)
+        self._positions = {}  # Maps filename to (offset, line number).
+
+    def start(self):
+        """ Start from the beginning of each file. """
+        self.result = ScanResult(self._scanner.patterns)
+        self.triggered = False
+        self._positions = {}
+
+    def poll(self):
+        """ Scan new lines, calling `callback` if a pattern is found. """
+        if self.triggered:
+            return
+        for filename in self.filenames:
+            self._scan(filename)
+        for pattern, found in self.result.lines.items():
+            if found:
+                self._logger.debug('%s: line %d: %r',
+                                   found[0][0], found[0][1], pattern)
+                self.triggered = True
+                self.callback(self.result)
+                break
+
+    def _scan(self, filename):
+        """ Scan lines appended to `filename` since last scan. """
+        offset, line = self._positions.get(filename, (0, 1))
+        try:
+            size = os.path.getsize(filename)
+        except OSError:
+            return
+        if size <= offset:
+            return
+        with open(filename, 'rb') as inp:
+            inp.seek(offset)
+            data = inp.read(size - offset)
+        end = data.rfind('\n') + 1  # Ignore any partial last line.
+        if not end:
+            return
+        data = data[:end]
+        self._scanner.scan_text(data, filename, line, self.result)
+        self._positions[filename] = (offset+end, line+data.count('\n'))
+
+
+class RunMonitor(threading.Thread):
+    """
+    Calls :meth:`MonitorTask.poll` for each of `tasks` every `delay` seconds
+    until :meth:`stop` is called.  Exceptions raised by a task are logged and
+    polling continues.  :meth:`MonitorTask.start` and
+    :meth:`MonitorTask.finish` are called in the caller's thread,
+    :meth:`MonitorTask.poll` in this thread.
+    """
+
+    def __init__(self, tasks, delay, logger):
+        super(RunMonitor, self).__init__(name='adpac-monitor')
+        self.daemon = True
+        self.tasks = list(tasks)
+        self.delay = delay
+        self._logger = logger
+        self._done = threading.Event()
+
+    def run(self):
+        """ Poll tasks until stopped. """
+        while True:
+            self._done.wait(self.delay)
+            if self._done.isSet():
+                break
+            self._call('poll')
+
+    def start(self):
+        """ Start tasks, then start polling. """
+        self._call('start')
+        super(RunMonitor, self).start()
+
+    def stop(self):
+        """ Stop polling, then let each task process any final data. """
+        self._done.set()
+        if self.isAlive():
+            self.join()
+        self._call('finish')
+
+    def _call(self, method):
+        """ Call `method` on each task, logging any exception. """
+        for task in self.tasks:
+            try:
+                getattr(task, method)()
+            except Exception as exc:
+                self._logger.warning('monitor %s.%s failed: %s',
+                                     task.__class__.__name__, method, exc)
@@ -35,7 +35,7 @@ def read(casename, logger, suffix='.restart.new'):
         if nbld > 1:
             zone.symmetry = 'rotational'
             zone.symmetry_axis = 'x'
-            zone.symmetry_instances = input.nbld[i]
+            zone.symmetry_instances = int(nbld)
         try:
             fcarb = input.fcarb[i]
         except IndexError:
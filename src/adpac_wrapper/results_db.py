@@ -0,0 +1,217 @@
+"""
+Append-only local store of ADPAC run results. Each run records the case
+hash, input parameters, convergence arrays, and probe values in an SQLite
+database, so results can be queried without touching case directories.
+Arrays are stored as raw binary blobs, one per column.
+"""
+
+import hashlib
+import os.path
+import sqlite3
+import time
+
+import numpy
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    case_hash TEXT NOT NULL,
+    casename TEXT NOT NULL,
+    directory TEXT,
+    timestamp REAL NOT NULL,
+    iterations INTEGER,
+    status TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_case_hash ON runs (case_hash);
+CREATE INDEX IF NOT EXISTS runs_casename ON runs (casename, timestamp);
+
+CREATE TABLE IF NOT EXISTS parameters (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    name TEXT NOT NULL,
+    value
+);
+CREATE INDEX IF NOT EXISTS parameters_run ON parameters (run_id);
+CREATE INDEX IF NOT EXISTS parameters_name ON parameters (name, value);
+
+CREATE TABLE IF NOT EXISTS arrays (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    name TEXT NOT NULL,
+    dtype TEXT NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (run_id, name)
+);
+
+CREATE TABLE IF NOT EXISTS probes (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    name TEXT NOT NULL,
+    ncyc INTEGER,
+    value REAL
+);
+CREATE INDEX IF NOT EXISTS probes_run ON probes (run_id);
+CREATE INDEX IF NOT EXISTS probes_name ON probes (name, run_id);
+"""
+
+_RUN_COLUMNS = ('id', 'case_hash', 'casename', 'directory', 'timestamp',
+                'iterations', 'status')
+
+
+def case_hash(filenames):
+    """ Return SHA1 hex digest of the contents of `filenames`. """
+    sha1 = hashlib.sha1()
+    for filename in filenames:
+        with open(filename, 'rb') as inp:
+            while True:
+                data = inp.read(1 << 20)
+                if not data:
+                    break
+                sha1.update(data)
+    return sha1.hexdigest()
+
+
+def input_parameters(inp):
+    """
+    Return dictionary of :class:`Input` `inp` input values suitable for
+    :meth:`ResultsDB.record`. Per-block values are recorded individually
+    as ``<name>(<block>)``.
+    """
+    parameters = {}
+    for name, value in inp.items(iotype='in'):
+        if name == 'header_lines':
+            continue
+        if isinstance(value, (list, numpy.ndarray)):
+            for i, item in enumerate(value):
+                parameters['%s(%d)' % (name, i+1)] = item
+        else:
+            parameters[name] = value
+    return parameters
+
+
+class ResultsDB(object):
+    """
+    Results database stored in `path`, created if necessary.
+    Multiple processes may record to the same database; each
+    :meth:`record` is a single transaction.
+    """
+
+    def __init__(self, path, timeout=60.):
+        self.path = path
+        self._connection = sqlite3.connect(path, timeout=timeout)
+        self._connection.executescript(_SCHEMA)
+
+    def close(self):
+        """ Close the database connection. """
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def record(self, case_hash, casename, parameters=None, arrays=None,
+               probes=None, iterations=None, status='', directory=None):
+        """
+        Record a run and return its id.
+
+        - `parameters` maps input name to scalar value.
+        - `arrays` maps name to 1D array.
+        - `probes` is a list of ``(name, ncyc, value)``, where `ncyc` \
+        may be None for final values.
+        """
+        if directory is None:
+            directory = os.getcwd()
+        with self._connection:
+            cursor = self._connection.execute(
+                'INSERT INTO runs (case_hash, casename, directory, timestamp,'
+                ' iterations, status) VALUES (?, ?, ?, ?, ?, ?)',
+                (case_hash, casename, directory, time.time(), iterations,
+                 status))
+            run_id = cursor.lastrowid
+
+            if parameters:
+                self._connection.executemany(
+                    'INSERT INTO parameters (run_id, name, value)'
+                    ' VALUES (?, ?, ?)',
+                    [(run_id, name, _scalar(value))
+                     for name, value in sorted(parameters.items())])
+            if arrays:
+                rows = []
+                for name, value in sorted(arrays.items()):
+                    value = numpy.ascontiguousarray(value)
+                    rows.append((run_id, name, value.dtype.str,
+                                 sqlite3.Binary(value.tostring())))
+                self._connection.executemany(
+                    'INSERT INTO arrays (run_id, name, dtype, data)'
+                    ' VALUES (?, ?, ?, ?)', rows)
+            if probes:
+                self._connection.executemany(
+                    'INSERT INTO probes (run_id, name, ncyc, value)'
+                    ' VALUES (?, ?, ?, ?)',
+                    [(run_id, name, ncyc, float(value))
+                     for name, ncyc, value in probes])
+        return run_id
+
+    def runs(self, case_hash=None, casename=None):
+        """
+        Return list of run dictionaries, optionally restricted to
+        `case_hash` and/or `casename`, oldest first.
+        """
+        sql = 'SELECT %s FROM runs' % ', '.join(_RUN_COLUMNS)
+        conditions = []
+        args = []
+        if case_hash is not None:
+            conditions.append('case_hash = ?')
+            args.append(case_hash)
+        if casename is not None:
+            conditions.append('casename = ?')
+            args.append(casename)
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        sql += ' ORDER BY id'
+        return [dict(zip(_RUN_COLUMNS, row))
+                for row in self._connection.execute(sql, args)]
+
+    def find(self, **parameters):
+        """ Return ids of runs with the given parameter values. """
+        sql = 'SELECT id FROM runs'
+        args = []
+        for i, (name, value) in enumerate(sorted(parameters.items())):
+            sql += ' JOIN parameters AS p%d ON p%d.run_id = runs.id' \
+                   ' AND p%d.name = ? AND p%d.value = ?' % (i, i, i, i)
+            args.extend((name, _scalar(value)))
+        sql += ' ORDER BY id'
+        return [row[0] for row in self._connection.execute(sql, args)]
+
+    def parameters(self, run_id):
+        """ Return dictionary of parameters for `run_id`. """
+        return dict(self._connection.execute(
+            'SELECT name, value FROM parameters WHERE run_id = ?', (run_id,)))
+
+    def array(self, run_id, name):
+        """ Return array `name` for `run_id`. """
+        row = self._connection.execute(
+            'SELECT dtype, data FROM arrays WHERE run_id = ? AND name = ?',
+            (run_id, name)).fetchone()
+        if row is None:
+            raise KeyError('No array %r for run %s' % (name, run_id))
+        return numpy.frombuffer(row[1], dtype=numpy.dtype(str(row[0]))).copy()
+
+    def probes(self, name, run_id=None):
+        """
+        Return list of ``(run_id, ncyc, value)`` for probe `name`,
+        optionally restricted to `run_id`.
+        """
+        sql = 'SELECT run_id, ncyc, value FROM probes WHERE name = ?'
+        args = [name]
+        if run_id is not None:
+            sql += ' AND run_id = ?'
+            args.append(run_id)
+        return self._connection.execute(sql + ' ORDER BY rowid',
+                                        args).fetchall()
+
+
+def _scalar(value):
+    """ Return `value` in a form SQLite accepts. """
+    if isinstance(value, (bool, numpy.bool_)):
+        return int(value)
+    if isinstance(value, numpy.integer):
+        return int(value)
+    if isinstance(value, numpy.floating):
+        return float(value)
+    return value
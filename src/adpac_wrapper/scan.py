@@ -0,0 +1,119 @@
+"""
+Single-pass scanning of ADPAC text output (``.output``, ``.log``) for
+diagnostic messages.  Each file is memory-mapped and searched once for all
+patterns via a precompiled alternation.
+"""
+
+import mmap
+import os.path
+import re
+
+WARNING = 'WARNING in Checkout!'
+ERRORS = ('ABORT in ERROR', 'ALERT!')
+NORMAL_TERMINATION = 'execution normally terminated'
+NO_CONTEXTS = 'No free InfiniPath contexts available'
+
+# Default patterns.
+PATTERNS = (WARNING,) + ERRORS + (NORMAL_TERMINATION, NO_CONTEXTS)
+
+
+class ScanResult(object):
+    """
+    Results of scanning for `patterns`.
+    `lines` maps each pattern to a list of ``(filename, line_number)``
+    for the lines it occurred in. Line numbers start at 1.
+    """
+
+    def __init__(self, patterns=PATTERNS):
+        self.lines = dict((pattern, []) for pattern in patterns)
+        self.filenames = []  # Files actually scanned.
+        self.missing = []    # Files not found.
+
+    def count(self, patterns, filename=None):
+        """
+        Return number of lines containing any of `patterns`
+        (optionally restricted to `filename`).
+        """
+        if isinstance(patterns, basestring):
+            patterns = (patterns,)
+        found = set()
+        for pattern in patterns:
+            for entry in self.lines[pattern]:
+                if filename is None or entry[0] == filename:
+                    found.add(entry)
+        return len(found)
+
+    @property
+    def warnings(self):
+        """ Number of Checkout warnings. """
+        return self.count(WARNING)
+
+    @property
+    def errors(self):
+        """ Number of error lines. """
+        return self.count(ERRORS)
+
+    @property
+    def normal_termination(self):
+        """ True if normal termination was reported. """
+        return self.count(NORMAL_TERMINATION) > 0
+
+
+class Scanner(object):
+    """ Scans for any of `patterns` in a single pass. """
+
+    def __init__(self, patterns=PATTERNS):
+        self.patterns = tuple(patterns)
+        self._regex = re.compile('|'.join([re.escape(pattern)
+                                           for pattern in self.patterns]))
+
+    def scan(self, filenames, result=None):
+        """
+        Scan `filenames`, returning a :class:`ScanResult` (`result` is
+        updated if specified). Missing files are recorded in
+        :attr:`ScanResult.missing`.
+        """
+        if result is None:
+            result = ScanResult(self.patterns)
+        if isinstance(filenames, basestring):
+            filenames = (filenames,)
+
+        for filename in filenames:
+            try:
+                size = os.path.getsize(filename)
+            except OSError:
+                result.missing.append(filename)
+                continue
+            result.filenames.append(filename)
+            if not size:
+                continue  # Can't mmap an empty file.
+            with open(filename, 'rb') as inp:
+                data = mmap.mmap(inp.fileno(), 0, access=mmap.ACCESS_READ)
+                try:
+                    self.scan_text(data, filename, 1, result)
+                finally:
+                    data.close()
+        return result
+
+    def scan_text(self, data, filename, line, result):
+        """
+        Scan `data` (a string or mmap) which starts at line number `line`
+        of `filename`, updating `result`.
+        """
+        pos = 0
+        for match in self._regex.finditer(data):
+            start = match.start()
+            line += data[pos:start].count('\n')
+            pos = start
+            entry = (filename, line)
+            found = result.lines[match.group()]
+            if not found or found[-1] != entry:
+                found.append(entry)
+
+
+_SCANNER = Scanner()
+
+
+def scan(filenames):
+    """ Scan `filenames` for the default patterns. """
+    return _SCANNER.scan(filenames)
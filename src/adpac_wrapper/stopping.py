@@ -0,0 +1,103 @@
+"""
+Policies for stopping ADPAC before `fncmax` iterations once the solution has
+settled. While ADPAC runs, the policy's :meth:`StopPolicy.check` is called
+with the :class:`Converge` object each time new convergence data is read.
+A non-empty return value is the reason for stopping.
+"""
+
+import numpy
+
+
+class StopPolicy(object):
+    """ Base class for early termination policies. Never stops. """
+
+    def check(self, converge):
+        """
+        Return reason for stopping based on `converge` data,
+        or None to continue.
+        """
+        return None
+
+
+class ResidualStall(StopPolicy):
+    """
+    Stop when the least-squares slope of `rms_error` (log10) per iteration
+    over the last `window` iterations recorded has magnitude less than
+    `threshold`.
+    """
+
+    def __init__(self, window=100, threshold=1e-4):
+        self.window = window
+        self.threshold = threshold
+
+    def check(self, converge):
+        """ Check slope of `rms_error`. """
+        if len(converge.rms_error) < max(self.window, 2):
+            return None
+        values = numpy.asarray(converge.rms_error[-self.window:], dtype=float)
+        iteration = numpy.asarray(converge.iteration[-self.window:],
+                                  dtype=float)
+        slope = numpy.polyfit(iteration, values, 1)[0]
+        if abs(slope) < self.threshold:
+            return 'rms_error slope %g over last %d iterations' \
+                   % (slope, self.window)
+        return None
+
+
+class MassBalance(StopPolicy):
+    """
+    Stop when the relative mismatch between `mass_inflow` and `mass_outflow`
+    has been less than `tolerance` for each of the last `window` iterations.
+    """
+
+    def __init__(self, window=100, tolerance=1e-3):
+        self.window = window
+        self.tolerance = tolerance
+
+    def check(self, converge):
+        """ Check mass flow mismatch. """
+        if len(converge.mass_inflow) < self.window or \
+           len(converge.mass_outflow) < self.window:
+            return None
+        inflow = numpy.asarray(converge.mass_inflow[-self.window:],
+                               dtype=float)
+        outflow = numpy.asarray(converge.mass_outflow[-self.window:],
+                                dtype=float)
+        mismatch = numpy.abs(inflow - outflow) / \
+                   numpy.maximum(numpy.abs(inflow), 1e-30)
+        if mismatch.max() < self.tolerance:
+            return 'mass flow mismatch %g over last %d iterations' \
+                   % (mismatch.max(), self.window)
+        return None
+
+
+class AnyOf(StopPolicy):
+    """ Stop when any of `policies` says to stop. """
+
+    def __init__(self, *policies):
+        self.policies = policies
+
+    def check(self, converge):
+        """ Return first reason to stop. """
+        for policy in self.policies:
+            reason = policy.check(converge)
+            if reason:
+                return reason
+        return None
+
+
+class AllOf(StopPolicy):
+    """ Stop when all of `policies` say to stop. """
+
+    def __init__(self, *policies):
+        self.policies = policies
+
+    def check(self, converge):
+        """ Return combined reasons if all say stop. """
+        reasons = []
+        for policy in self.policies:
+            reason = policy.check(converge)
+            if not reason:
+                return None
+            reasons.append(reason)
+        return ', '.join(reasons)
@@ -0,0 +1,363 @@
+import logging
+import os.path
+import pkg_resources
+import random
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+import nose
+
+from adpac_wrapper.boundata import Boundata
+from adpac_wrapper.comm_model import CommModel
+from adpac_wrapper.input import Input
+
+TEST_DIR = os.path.realpath(
+    pkg_resources.resource_filename('adpac_wrapper', 'test'))
+
+
+class TestCase(unittest.TestCase):
+    """ Test boundary condition handling. """
+
+    def write_patches(self, casename, patches):
+        """ Write SSVI, local PATCH, then (lblock1, lblock2, size) pairs. """
+        with open(casename+'.boundata', 'w') as out:
+            out.write('SSVI 1 1 J J P P I K 1 1 1 9 1 9 1 9 1 9\n')
+            out.write('PATCH 1 1 I I P M I K 1 9 1 9 1 9 1 9 1 9\n')
+            for lblock1, lblock2, size in patches:
+                for blocks in ((lblock1, lblock2), (lblock2, lblock1)):
+                    out.write('PATCH %d %d I I P M I K 1 9 1 %d 1 1'
+                              ' 1 %d 1 1\n' % (blocks + (size, size)))
+
+    def check_order(self, boundata, npairs):
+        """ Check scheduled BC ordering contract. """
+        bcs = boundata._bcs
+        self.assertEqual(bcs[0].lblock1, bcs[0].lblock2)
+        self.assertEqual(bcs[-1].type_name, 'SSVI')
+        for i in range(npairs):
+            bc1, bc2 = bcs[1+2*i], bcs[2+2*i]
+            self.assertEqual((bc1.lblock1, bc1.lblock2),
+                             (bc2.lblock2, bc2.lblock1))
+
+    def test_config_errors(self):
+        logging.debug('')
+        logging.debug('test_config_errors')
+
+        inp = Input()
+        boundata = Boundata()
+        boundata.read(os.path.join(TEST_DIR, 'all-bcs'), inp)
+        self.assertEqual(boundata.config_errors(), [])
+        boundata.check_config()
+
+        names = {}
+        for i, _bc in enumerate(boundata._bcs):
+            names.setdefault(_bc.type_name, 'BC_%d' % (i+1))
+
+        patch = getattr(boundata, names['PATCH'])
+        patch.lface1 = 'X'
+        patch.ldir2 = 'PM'  # Not truncated to a legal letter.
+        patch.n1lim2 = patch.n1lim1 - 1
+        ssvi = getattr(boundata, names['SSVI'])
+        ssvi.m1lim2 = ssvi.m1lim1
+        system = getattr(boundata, names['SYSTEM'])
+        system.command = ''
+
+        errors = boundata.config_errors()
+        self.assertEqual(len(errors), 5)
+        for name, msg in ((names['PATCH'], 'lface1 (X) must be I, J, or K.'),
+                          (names['PATCH'], 'ldir2 (PM) must be P or M.'),
+                          (names['PATCH'], 'n1lim2 (%d) must be >= n1lim1'
+                                           % patch.n1lim2),
+                          (names['SSVI'], 'm1lim2 (%d) must be > m1lim1'
+                                          % ssvi.m1lim2),
+                          (names['SYSTEM'], 'command must be specified.')):
+            for error in errors:
+                if name in error and msg in error:
+                    break
+            else:
+                self.fail('%s: %s not in %s' % (name, msg, errors))
+
+        try:
+            boundata.check_config()
+        except ValueError as exc:
+            self.assertTrue('5 configuration errors' in str(exc))
+        else:
+            self.fail('Expected ValueError')
+
+    def test_promotion(self):
+        logging.debug('')
+        logging.debug('test_promotion')
+
+        inp = Input()
+        boundata = Boundata()
+        boundata.read(os.path.join(TEST_DIR, 'all-bcs'), inp)
+        self.assertEqual(boundata.list_containers(), [])
+        names = {}
+        for i, _bc in enumerate(boundata._bcs):
+            names.setdefault(_bc.type_name, 'BC_%d' % (i+1))
+
+        # Round trip without promotion.
+        directory = tempfile.mkdtemp()
+        try:
+            casename = os.path.join(directory, 'new')
+            boundata.write(casename, inp)
+            self.assertEqual(boundata.list_containers(), [])
+            with open(casename+'.boundata', 'r') as inp1:
+                text = inp1.read()
+            self.assertTrue('\n ISHFTDR DSHIFT\n' in text)
+
+            boundata2 = Boundata()
+            boundata2.read(casename, inp)
+            boundata2.write(casename, inp)
+            with open(casename+'.boundata', 'r') as inp2:
+                self.assertEqual(inp2.read(), text)
+
+            # Access promotes, output is unchanged.
+            bcint1 = getattr(boundata, names['BCINT1'])
+            self.assertEqual(bcint1.__class__.__name__, 'BCInt1')
+            self.assertEqual(bcint1.ishftdr, 2)
+            self.assertTrue(bcint1 in boundata._bcs)
+            self.assertTrue(getattr(boundata, names['BCINT1']) is bcint1)
+            self.assertEqual(boundata.list_containers(), [names['BCINT1']])
+            boundata.write(casename, inp)
+            with open(casename+'.boundata', 'r') as inp1:
+                self.assertEqual(inp1.read(), text)
+            bcint1.dshift = 0.5
+            boundata.write(casename, inp)
+            with open(casename+'.boundata', 'r') as inp1:
+                self.assertTrue('\n 2 0.5\n' in inp1.read())
+
+            # Changed reference conditions promote dimensional BCs.
+            inp.pref *= 2.
+            boundata2.write(casename, inp)
+            self.assertTrue(names['INLETT'] in boundata2.list_containers())
+            self.assertTrue(names['PATCH'] not in boundata2.list_containers())
+        finally:
+            shutil.rmtree(directory)
+
+        # Re-read discards promoted BCs.
+        boundata.read(os.path.join(TEST_DIR, 'all-bcs'), inp)
+        self.assertEqual(boundata.list_containers(), [])
+
+        self.assertRaises(AttributeError, getattr, boundata, 'BC_0')
+
+    def test_unrecognized(self):
+        logging.debug('')
+        logging.debug('test_unrecognized')
+
+        directory = tempfile.mkdtemp()
+        try:
+            casename = os.path.join(directory, 'bad')
+            with open(casename+'.boundata', 'w') as out:
+                out.write('EXITG 1 1 I I M M L H 73 73 1 21 1 25 13 13 1 25\n'
+                          ' PEXIT\n'
+                          ' 0.625\n'
+                          '\n'
+                          'PACTH 1 1 I I M M L H 73 73 1 21 1 25 13 13 1 25\n')
+            boundata = Boundata()
+            try:
+                boundata.read(casename, Input())
+            except ValueError as exc:
+                self.assertTrue("line 5: unrecognized BC type 'PACTH'"
+                                in str(exc))
+            else:
+                self.fail('Expected ValueError')
+        finally:
+            shutil.rmtree(directory)
+
+    def test_data_keyword(self):
+        logging.debug('')
+        logging.debug('test_data_keyword')
+
+        directory = tempfile.mkdtemp()
+        try:
+            casename = os.path.join(directory, 'data')
+            with open(casename+'.boundata', 'w') as out:
+                out.write('BDATIN 1 1 I I M M L H 73 73 1 21 1 25 13 13 1 25\n'
+                          ' FILENAME\n'
+                          ' free\n'
+                          'PATCH 1 2 I I M M L H 73 1 1 21 1 25 1 21 1 25\n')
+            boundata = Boundata()
+            boundata.read(casename, Input())
+            self.assertEqual(len(boundata.table()), 2)
+            self.assertEqual(boundata.BC_1.filename, 'free')
+
+            # Incomplete header after data lines.
+            with open(casename+'.boundata', 'w') as out:
+                out.write('BDATIN 1 1 I I M M L H 73 73 1 21 1 25 13 13 1 25\n'
+                          ' FILENAME\n'
+                          ' free\n'
+                          'PATCH 1 2 I I M M L H 73 1 1 21 1 25 1 21 1\n')
+            try:
+                boundata.read(casename, Input())
+            except ValueError as exc:
+                self.assertTrue('line 4: expecting 19 fields, got 18.'
+                                in str(exc))
+            else:
+                self.fail('Expected ValueError')
+        finally:
+            shutil.rmtree(directory)
+
+    def test_table(self):
+        logging.debug('')
+        logging.debug('test_table')
+
+        boundata = Boundata()
+        boundata.read(os.path.join(TEST_DIR, 'all-bcs'), Input())
+        table = boundata.table()
+        self.assertEqual(len(table), len(boundata._bcs))
+        self.assertEqual(table['lface1'].dtype.char, 'S')
+        self.assertEqual((table['lface1'] == 'J').sum(),
+                         sum([_bc.lface1 == 'J' for _bc in boundata._bcs]))
+
+        expected = [i for i, _bc in enumerate(boundata._bcs)
+                    if _bc.type_name == 'SSVI' and _bc.lblock1 == 1 and
+                       _bc.lface1 == 'J']
+        self.assertEqual(boundata.where('SSVI', lblock1=1, lface1='J').tolist(),
+                         expected)
+        self.assertEqual(len(boundata.where('PATCH')), 2)
+        self.assertEqual(len(boundata.where('NOTABC')), 0)
+        self.assertRaises(ValueError, boundata.where, color='red')
+
+        # Modifying a BC updates the table.
+        i = expected[0]
+        ssvi = getattr(boundata, 'BC_%d' % (i+1))
+        ssvi.lblock1 = 2
+        self.assertTrue(i not in boundata.where('SSVI', lblock1=1).tolist())
+        self.assertEqual(boundata.table()['lblock1'][i], 2)
+
+        # Scheduling reorders the table.
+        boundata.schedule()
+        table = boundata.table()
+        self.assertEqual(table['lblock1'].tolist(),
+                         [_bc.lblock1 for _bc in boundata._bcs])
+
+    def test_find(self):
+        logging.debug('')
+        logging.debug('test_find')
+
+        def expected(type_name, lblock1, lface1, ldir1):
+            return [i for i, _bc in enumerate(boundata._bcs)
+                    if _bc.type_name == type_name and _bc.lblock1 == lblock1
+                       and _bc.lface1 == lface1 and _bc.ldir1 == ldir1]
+
+        boundata = Boundata()
+        boundata.read(os.path.join(TEST_DIR, 'all-bcs'), Input())
+        found = boundata.find('SSVI', 1, 'J', 'P')
+        self.assertTrue(found)
+        self.assertEqual(found, expected('SSVI', 1, 'J', 'P'))
+        self.assertEqual(boundata.find('SSVI', 99, 'J', 'P'), [])
+        self.assertEqual(boundata.find('NOTABC', 1, 'J', 'P'), [])
+
+        # Edits and scheduling are reflected.
+        ssvi = getattr(boundata, 'BC_%d' % (found[0]+1))
+        ssvi.ldir1 = 'M'
+        self.assertEqual(boundata.find('SSVI', 1, 'J', 'M'),
+                         expected('SSVI', 1, 'J', 'M'))
+        boundata.schedule()
+        self.assertEqual(boundata.find('SSVI', 1, 'J', 'M'),
+                         expected('SSVI', 1, 'J', 'M'))
+        self.assertEqual(boundata.find('PATCH', 1, 'K', 'M'),
+                         expected('PATCH', 1, 'K', 'M'))
+
+    def test_schedule(self):
+        logging.debug('')
+        logging.debug('test_schedule')
+
+        directory = tempfile.mkdtemp()
+        try:
+            casename = os.path.join(directory, 'sched')
+
+            # Star: block 1 exchanges with 4 others, largest first.
+            self.write_patches(casename, [(1, 2, 5), (3, 1, 20), (1, 4, 10),
+                                     (5, 1, 15)])
+            boundata = Boundata()
+            boundata.read(casename, Input())
+            self.assertEqual(boundata.schedule(), 4)
+            self.check_order(boundata, 4)
+            self.assertEqual([_bc.size() for _bc in boundata._bcs[1:-1:2]],
+                             [20, 15, 10, 5])
+
+            # Ring: two rounds, disjoint exchanges share a round.
+            self.write_patches(casename, [(1, 2, 9), (2, 3, 8), (3, 4, 7),
+                                     (4, 1, 6)])
+            boundata.read(casename, Input())
+            self.assertEqual(boundata.schedule(), 2)
+            self.check_order(boundata, 4)
+            self.assertEqual([_bc.size() for _bc in boundata._bcs[1:-1:2]],
+                             [9, 7, 8, 6])
+
+            # Large case.
+            random.seed(0)
+            patches = []
+            for i in range(5000):
+                lblock1 = random.randint(1, 500)
+                lblock2 = random.randint(1, 499)
+                if lblock2 >= lblock1:
+                    lblock2 += 1
+                patches.append((lblock1, lblock2, random.randint(1, 50)))
+            self.write_patches(casename, patches)
+            boundata.read(casename, Input())
+            start = time.time()
+            rounds = boundata.schedule()
+            logging.debug('    %d rounds in %.3f sec',
+                          rounds, time.time() - start)
+            self.check_order(boundata, 5000)
+
+            # Missing other half.
+            with open(casename+'.boundata', 'a') as out:
+                out.write('PATCH 7 8 I I P M I K 1 9 1 9 1 9 1 9 1 9\n')
+            boundata.read(casename, Input())
+            self.assertRaises(RuntimeError, boundata.schedule)
+        finally:
+            shutil.rmtree(directory)
+
+    def test_schedule_by_cost(self):
+        logging.debug('')
+        logging.debug('test_schedule_by_cost')
+
+        directory = tempfile.mkdtemp()
+        try:
+            casename = os.path.join(directory, 'sched')
+            self.write_patches(casename, [(1, 2, 20), (2, 3, 10), (3, 4, 5)])
+            boundata = Boundata()
+            boundata.read(casename, Input())
+
+            # Block 1 takes much longer to update than the others, so
+            # exchanges not involving it should go first.
+            model = CommModel(cells=[1000, 10, 10, 10], cell_time=1.,
+                              latency=1., point_time=0.1)
+            current = boundata.predict_timeline(model)
+            self.assertEqual(current.strategy, 'current')
+            self.assertEqual(current.makespan, 1000. + 3. + 2. + 1.5)
+
+            timeline = boundata.schedule_by_cost(model)
+            logging.debug(timeline.report())
+            self.assertEqual(timeline.makespan, 1000. + 3.)
+            self.assertEqual(timeline.strategy, 'ready')
+            self.check_order(boundata, 3)
+            self.assertEqual([_bc.lblock1 for _bc in boundata._bcs[1:-1:2]],
+                             [2, 3, 1])
+            self.assertEqual(boundata.predict_timeline(model).makespan,
+                             timeline.makespan)
+
+            report = timeline.report()
+            self.assertTrue('makespan 1.003000e+03 sec' in report)
+            self.assertEqual(len(report.split('\n')), 3 + 3 + 2 + 4 + 1)
+
+            # Blocks sharing a rank copy rather than communicate.
+            model = CommModel(ranks=[0, 0, 1, 1], latency=1., point_time=0.1,
+                              copy_time=0.)
+            timeline = boundata.schedule_by_cost(model)
+            self.assertEqual(timeline.makespan, 2.)
+            self.assertEqual(sorted(timeline.finish), [0, 1])
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    sys.argv.append('--cover-package=adpac_wrapper.')
+    sys.argv.append('--cover-erase')
+    nose.runmodule()
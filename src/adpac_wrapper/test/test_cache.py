@@ -0,0 +1,119 @@
+import glob
+import logging
+import os.path
+import pkg_resources
+import shutil
+import sys
+import tempfile
+import unittest
+from cStringIO import StringIO
+
+import nose
+
+import adpac_wrapper  # Registers all BCs.
+from adpac_wrapper.boundata import Boundata
+from adpac_wrapper.cache import ParseCache
+from adpac_wrapper.input import Input
+
+ORIG_DIR = os.getcwd()
+
+TEST_DIR = os.path.realpath(
+    pkg_resources.resource_filename('adpac_wrapper', 'test'))
+
+
+class TestCase(unittest.TestCase):
+    """ Test parsed-case cache. """
+
+    def setUp(self):
+        """ Called before each test in this class. """
+        self.directory = tempfile.mkdtemp()
+        os.chdir(self.directory)
+        for ext in ('.input', '.boundata'):
+            shutil.copy(os.path.join(TEST_DIR, 'all-bcs'+ext), '.')
+
+    def tearDown(self):
+        """ Called after each test in this class. """
+        os.chdir(ORIG_DIR)
+        shutil.rmtree(self.directory)
+
+    def read(self, casename, cache):
+        """ Return :class:`Input` and :class:`Boundata` read via `cache`. """
+        inp = Input()
+        inp.read(casename, cache)
+        boundata = Boundata()
+        boundata.read(casename, inp, cache)
+        return (inp, boundata)
+
+    def generate(self, inp, boundata):
+        """ Return generated ``.input`` and ``.boundata`` text. """
+        inp.write('new')
+        boundata.write('new', inp)
+        text = []
+        for ext in ('.input', '.boundata'):
+            with open('new'+ext, 'r') as stream:
+                text.append(stream.read())
+        return text
+
+    def test_cache(self):
+        logging.debug('')
+        logging.debug('test_cache')
+
+        cache = ParseCache('cache')
+        inp1, boundata1 = self.read('all-bcs', cache)
+        self.assertEqual(len(glob.glob('cache/*.npz')), 2)
+
+        inp2, boundata2 = self.read('all-bcs', cache)
+        self.assertEqual(len(glob.glob('cache/*.npz')), 2)
+
+        self.assertEqual(self.generate(inp1, boundata1),
+                         self.generate(inp2, boundata2))
+
+        # Cached data lines are read when BCs are accessed.
+        for boundata in (boundata1, boundata2):
+            for i in range(len(boundata.table())):
+                getattr(boundata, 'BC_%d' % (i+1))
+        self.assertEqual(self.generate(inp1, boundata1),
+                         self.generate(inp2, boundata2))
+
+        # Identical contents are shared.
+        for ext in ('.input', '.boundata'):
+            shutil.copy('all-bcs'+ext, 'other'+ext)
+        self.read('other', cache)
+        self.assertEqual(len(glob.glob('cache/*.npz')), 2)
+
+        # Different reference conditions.
+        inp1.pref *= 2.
+        Boundata().read('all-bcs', inp1, cache)
+        self.assertEqual(len(glob.glob('cache/*.npz')), 3)
+
+    def test_incremental(self):
+        logging.debug('')
+        logging.debug('test_incremental')
+
+        inp, boundata = self.read('all-bcs', None)
+        self.generate(inp, boundata)
+        stamps = [os.stat('new'+ext).st_ino for ext in ('.input', '.boundata')]
+
+        # Unchanged, files not rewritten.
+        self.generate(inp, boundata)
+        self.assertEqual([os.stat('new'+ext).st_ino
+                          for ext in ('.input', '.boundata')], stamps)
+        self.assertEqual(glob.glob('.new*.tmp'), [])
+
+        # Modify input and a BC, files rewritten.
+        inp.cfmax *= 2.
+        _bc = boundata._bcs[0]
+        _bc.lblock2 += 1
+        text = self.generate(inp, boundata)
+        self.assertNotEqual([os.stat('new'+ext).st_ino
+                             for ext in ('.input', '.boundata')], stamps)
+        self.assertTrue('CFMAX' in text[0])
+        expected = StringIO()
+        _bc.write(expected, 1, inp)
+        self.assertTrue(expected.getvalue() in text[1])
+
+
+if __name__ == '__main__':
+    sys.argv.append('--cover-package=adpac_wrapper.')
+    sys.argv.append('--cover-erase')
+    nose.runmodule()
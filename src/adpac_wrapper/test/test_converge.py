@@ -0,0 +1,264 @@
+import logging
+import os.path
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+import nose
+
+from adpac_wrapper.converge import Converge
+from adpac_wrapper.stopping import AllOf, AnyOf, MassBalance, ResidualStall
+
+ORIG_DIR = os.getcwd()
+
+HEADER = """\
+ ADPAC convergence history
+ ITER  LOG10(MAX)  LOG10(RMS)  MASS IN  MASS OUT  P RATIO  EFF  SS  SEP
+ ----
+
+"""
+
+LINE = ' %5d %10.5f %10.5f %10.5f %10.5f %8.5f %8.5f %4d %4d\n'
+
+
+def converge_line(i):
+    """ Return a synthetic convergence line for iteration `i`. """
+    return LINE % (i, -1.-0.01*i, -2.-0.01*i, 100.+i, 99.-i, 1.5, 0.9,
+                   i, 2*i)
+
+
+class TestCase(unittest.TestCase):
+    """ Test convergence file processing. """
+
+    def setUp(self):
+        """ Called before each test in this class. """
+        self.directory = tempfile.mkdtemp()
+        os.chdir(self.directory)
+        self.converge = Converge()
+
+    def tearDown(self):
+        """ Called after each test in this class. """
+        os.chdir(ORIG_DIR)
+        shutil.rmtree(self.directory)
+
+    def test_update(self):
+        logging.debug('')
+        logging.debug('test_update')
+
+        with open('case.converge', 'w') as out:
+            out.write(HEADER)
+            for i in range(1, 11):
+                out.write(converge_line(i))
+            out.write(converge_line(11)[:20])  # Partial line.
+
+        self.converge.update('case')
+        self.assertEqual(len(self.converge.rms_error), 10)
+        self.assertEqual(self.converge.ss_pts[-1], 10)
+
+        with open('case.converge', 'a') as out:
+            out.write(converge_line(11)[20:])
+            for i in range(12, 21):
+                out.write(converge_line(i))
+
+        self.converge.update('case')
+        self.assertEqual(len(self.converge.rms_error), 20)
+        self.assertEqual(self.converge.ss_pts[10], 11)
+        self.assertEqual(self.converge.sep_pts[-1], 40)
+
+        # Rewritten file.
+        with open('case.converge', 'w') as out:
+            out.write(HEADER)
+            for i in range(1, 6):
+                out.write(converge_line(i))
+
+        self.converge.update('case')
+        self.assertEqual(len(self.converge.rms_error), 5)
+
+        self.converge.read('case')
+        self.assertEqual(len(self.converge.rms_error), 5)
+
+    def test_history(self):
+        logging.debug('')
+        logging.debug('test_history')
+
+        with open('case.converge', 'w') as out:
+            out.write(HEADER)
+        for policy in ('all', 'tail', 'decimated'):
+            self.converge.history = policy
+            self.converge.history_size = 10
+            self.converge.average_window = 5
+            self.converge.read('case')
+            for i in range(1, 101):
+                with open('case.converge', 'a') as out:
+                    out.write(converge_line(i))
+                if i % 7 == 0 or i == 100:
+                    self.converge.update('case')
+
+            iteration = list(self.converge.iteration)
+            if policy == 'all':
+                self.assertEqual(iteration, range(1, 101))
+            elif policy == 'tail':
+                self.assertEqual(iteration, range(91, 101))
+            else:
+                self.assertEqual(iteration,
+                                 [1, 2, 3, 5, 9, 17, 33, 65] + range(91, 101))
+
+            # Statistics are independent of policy.
+            self.assertEqual(self.converge.mass_inflow_last, 200.)
+            self.assertEqual(self.converge.mass_inflow_min, 101.)
+            self.assertEqual(self.converge.mass_inflow_avg, 198.)
+            self.assertEqual(self.converge.sep_pts_last, 200.)
+
+            # Restore for next pass.
+            with open('case.converge', 'w') as out:
+                out.write(HEADER)
+
+    def test_benchmark(self):
+        logging.debug('')
+        logging.debug('test_benchmark')
+
+        # 50k lines, read at once and in 500 incremental updates.
+        # Timings are only logged.
+        lines = [converge_line(i) for i in range(1, 50001)]
+        with open('case.converge', 'w') as out:
+            out.write(HEADER)
+            out.writelines(lines)
+        start = time.time()
+        self.converge.read('case')
+        logging.debug('read 50k lines: %.3f sec', time.time() - start)
+        self.assertEqual(len(self.converge.iteration), 50000)
+
+        self.converge.clear()
+        with open('case.converge', 'w') as out:
+            out.write(HEADER)
+        capacities = set()
+        start = time.time()
+        for i in range(0, 50000, 100):
+            with open('case.converge', 'a') as out:
+                out.writelines(lines[i:i+100])
+            self.converge.update('case')
+
+            # Processed up to end of file.
+            offset = self.converge._files['case.converge'][1]
+            self.assertEqual(offset, os.path.getsize('case.converge'))
+            history = self.converge._histories['case.converge']
+            capacities.add(len(history._data))
+        logging.debug('500 updates: %.3f sec', time.time() - start)
+        self.assertEqual(len(self.converge.iteration), 50000)
+        self.assertEqual(self.converge.iteration[-1], 50000)
+
+        # Buffer capacity doubled, not grown on each update.
+        self.assertTrue(len(capacities) <= 10)
+
+        # Already processed data is not read again.
+        with open('case.converge', 'r+') as out:
+            out.seek(len(HEADER))
+            out.write('X'*len(lines[0]))
+        with open('case.converge', 'a') as out:
+            out.write(converge_line(50001))
+        self.converge.update('case')
+        self.assertEqual(self.converge.iteration[0], 1)
+        self.assertEqual(self.converge.iteration[-1], 50001)
+
+    def test_export(self):
+        logging.debug('')
+        logging.debug('test_export')
+
+        with open('case.converge', 'w') as out:
+            out.write(HEADER)
+            for i in range(1, 4):
+                out.write(converge_line(i))
+        self.converge.read('case')
+
+        self.converge.write()
+        with open('converge.csv', 'r') as inp:
+            lines = inp.readlines()
+        self.assertEqual(len(lines), 4)
+        self.assertEqual(lines[0], 'iteration, max_error, rms_error,'
+                                   ' mass_inflow, mass_outflow,'
+                                   ' pressure_ratio, efficiency, ss_pts,'
+                                   ' sep_pts\n')
+        self.assertEqual(lines[3], '3, -1.03, -2.03, 103, 96, 1.5, 0.9, 3, 6\n')
+        self.assertFalse(os.path.exists('zoom.csv'))
+
+        self.converge.save('case.npz')
+        loaded = Converge()
+        loaded.load('case.npz')
+        self.assertEqual(list(loaded.iteration), [1, 2, 3])
+        self.assertEqual(list(loaded.sep_pts), [2, 4, 6])
+        self.assertEqual(loaded.mass_inflow_last, 103.)
+        self.assertEqual(len(loaded.nstep), 0)
+
+    def test_rates(self):
+        logging.debug('')
+        logging.debug('test_rates')
+
+        self.converge.fit_window = 20
+        with open('case.converge', 'w') as out:
+            out.write(HEADER)
+            for i in range(1, 51):
+                out.write(converge_line(i))
+        self.converge.read('case')
+        self.assertAlmostEqual(self.converge.rms_slope, -0.01, 5)
+        self.assertEqual(self.converge.predicted_iterations, -1)  # Mass.
+
+        with open('case.converge', 'w') as out:
+            out.write(HEADER)
+            for i in range(1, 51):
+                out.write(LINE % (i, -1., -2.-0.01*i,
+                                  100., 100.-10**(-0.02*i), 1.5, 0.9, 0, 0))
+        self.converge.mass_tolerance = 1e-4
+        self.converge.read('case')
+        self.assertAlmostEqual(self.converge.mass_slope, -0.02, 3)
+        self.assertTrue(abs(self.converge.predicted_iterations - 350) <= 1)
+
+        self.converge.rms_tolerance = -2.
+        self.converge.read('case')
+        self.assertTrue(abs(self.converge.predicted_iterations - 50) <= 1)
+
+        self.converge.fit_window = 100
+        self.converge.read('case')
+        self.assertEqual(self.converge.predicted_iterations, -1)
+
+    def test_stop_policies(self):
+        logging.debug('')
+        logging.debug('test_stop_policies')
+
+        with open('case.converge', 'w') as out:
+            out.write(HEADER)
+            for i in range(1, 51):
+                out.write(converge_line(i))
+        self.converge.read('case')
+
+        # Residual still dropping 0.01 per iteration.
+        self.assertEqual(ResidualStall(20, 1e-3).check(self.converge), None)
+        self.assertTrue(ResidualStall(20, 0.1).check(self.converge))
+
+        # Mass flows diverging.
+        self.assertEqual(MassBalance(10, 0.01).check(self.converge), None)
+        self.assertTrue(MassBalance(10, 1.).check(self.converge))
+
+        self.assertTrue(AnyOf(ResidualStall(20, 1e-3),
+                              MassBalance(10, 1.)).check(self.converge))
+        self.assertEqual(AllOf(ResidualStall(20, 1e-3),
+                               MassBalance(10, 1.)).check(self.converge), None)
+
+        # Not enough data.
+        self.assertEqual(ResidualStall(100, 0.1).check(self.converge), None)
+
+        # Slope is per iteration, not per line.
+        with open('case.converge', 'w') as out:
+            out.write(HEADER)
+            for i in range(10, 501, 10):
+                out.write(converge_line(i))
+        self.converge.read('case')
+        self.assertTrue(ResidualStall(20, 0.05).check(self.converge))
+        self.assertEqual(ResidualStall(20, 1e-3).check(self.converge), None)
+
+
+if __name__ == '__main__':
+    sys.argv.append('--cover-package=adpac_wrapper.')
+    sys.argv.append('--cover-erase')
+    nose.runmodule()
@@ -0,0 +1,103 @@
+import filecmp
+import logging
+import os.path
+import pkg_resources
+import shutil
+import sys
+import tempfile
+import unittest
+
+import nose
+
+from adpac_wrapper.boundata import Boundata
+from adpac_wrapper.doe import CaseGenerator
+from adpac_wrapper.input import Input
+
+ORIG_DIR = os.getcwd()
+
+TEST_DIR = os.path.realpath(
+    pkg_resources.resource_filename('adpac_wrapper', 'test'))
+
+INPUT = """\
+# DOE template
+ CFL      = -3.5
+ FNCMAX   = 200
+ RPM(1)   = 1000.
+ RPM(2)   = -2000.
+"""
+
+
+class TestCase(unittest.TestCase):
+    """ Test DOE case generation. """
+
+    def setUp(self):
+        """ Called before each test in this class. """
+        self.directory = tempfile.mkdtemp()
+        os.chdir(self.directory)
+        shutil.copy(os.path.join(TEST_DIR, 'all-bcs.boundata'),
+                    'template.boundata')
+        with open('template.input', 'w') as out:
+            out.write(INPUT)
+
+    def tearDown(self):
+        """ Called after each test in this class. """
+        os.chdir(ORIG_DIR)
+        shutil.rmtree(self.directory)
+
+    def test_generate(self):
+        logging.debug('')
+        logging.debug('test_generate')
+
+        inp = Input()
+        inp.read('template')
+        boundata = Boundata()
+        boundata.read('template', inp)
+        names = {}
+        for i, _bc in enumerate(boundata._bcs):
+            names.setdefault(_bc.type_name, 'BC_%d' % (i+1))
+
+        columns = ['cfl', 'input.fncmax', ('input.rpm', 1),
+                   'boundata.%s.pexit' % names['EXITG'],
+                   'boundata.%s.rpmwall' % names['ENDTTA']]
+        matrix = [[-3.5, 200, -2000., 2000., 0.],
+                  [-2.0, 300, -2500., 2100., 100.],
+                  [-1.5, 400, -3000., 2200., -200.]]
+        generator = CaseGenerator('template', columns)
+        generator.generate(matrix, ['pool_%d' % i for i in range(3)],
+                           processes=2)
+        generator.generate(matrix, ['serial_%d' % i for i in range(3)],
+                           processes=1)
+
+        # Reference: modify template and write.
+        for i, row in enumerate(matrix):
+            inp = Input()
+            inp.read('template')
+            boundata = Boundata()
+            boundata.read('template', inp)
+            inp.cfl, inp.fncmax, inp.rpm[1] = row[:3]
+            getattr(boundata, names['EXITG']).pexit = row[3]
+            getattr(boundata, names['ENDTTA']).rpmwall = row[4]
+            os.mkdir('ref_%d' % i)
+            os.chdir('ref_%d' % i)
+            inp.write('template')
+            boundata.write('template', inp)
+            os.chdir('..')
+
+            for prefix in ('pool', 'serial'):
+                for ext in ('.input', '.boundata'):
+                    path = os.path.join('%s_%d' % (prefix, i), 'template'+ext)
+                    ref = os.path.join('ref_%d' % i, 'template'+ext)
+                    self.assertTrue(filecmp.cmp(path, ref, shallow=False),
+                                    '%s differs from %s' % (path, ref))
+
+        self.assertRaises(ValueError, CaseGenerator, 'template', ['notavar'])
+        self.assertRaises(ValueError, CaseGenerator, 'template', ['rpm'])
+        self.assertRaises(ValueError, CaseGenerator, 'template',
+                          [('rpm', 2)])
+        self.assertRaises(ValueError, generator.generate, [[1.]], ['x'])
+
+
+if __name__ == '__main__':
+    sys.argv.append('--cover-package=adpac_wrapper.')
+    sys.argv.append('--cover-erase')
+    nose.runmodule()
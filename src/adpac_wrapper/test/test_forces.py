@@ -0,0 +1,93 @@
+import logging
+import os.path
+import shutil
+import sys
+import tempfile
+import unittest
+
+import nose
+
+from adpac_wrapper.forces import Forces
+
+ORIG_DIR = os.getcwd()
+
+FORCES = """\
+ ADPAC forces
+ BLOCK  FX  FY  FZ  MX  MY  MZ
+   2  1.0  2.0  3.0  4.0  5.0  6.0
+   1  1.1  2.1  3.1  4.1  5.1  6.1
+
+ ITERATION 2
+   2  1.5  2.5  3.5  4.5  5.5  6.5
+   1  -1.5e-2  2.5  3.5  4.5  5.5  6.5
+"""
+
+FORCES_IREVS = """\
+ ADPAC forces
+ BLOCK  FX  FY  FZ  MX  MY  MZ  RPM  POWER
+   1  1.0  2.0  3.0  -1.25D+03  5.0  6.0  -1.2D+04  2.856D+03
+   2  1.5  2.5  3.5  0.0  5.5  6.5  0.0  0.0
+"""
+
+
+class TestCase(unittest.TestCase):
+    """ Test forces file processing. """
+
+    def setUp(self):
+        """ Called before each test in this class. """
+        self.directory = tempfile.mkdtemp()
+        os.chdir(self.directory)
+
+    def tearDown(self):
+        """ Called after each test in this class. """
+        os.chdir(ORIG_DIR)
+        shutil.rmtree(self.directory)
+
+    def test_read(self):
+        logging.debug('')
+        logging.debug('test_read')
+
+        forces = Forces()
+        forces.read('case')  # Missing file.
+        self.assertEqual(len(forces.block), 0)
+
+        with open('case.forces', 'w') as out:
+            out.write(FORCES)
+        forces.read('case')
+        self.assertEqual(list(forces.block), [1, 2])
+        self.assertEqual(list(forces.fx), [-1.5e-2, 1.5])
+        self.assertEqual(list(forces.mz), [6.5, 6.5])
+
+        with open('case.forces', 'w') as out:
+            out.write('  1  1.0  2.0  3.0\n')
+        forces.read('case')  # Unexpected layout.
+        self.assertEqual(len(forces.block), 0)
+        self.assertEqual(len(forces.fx), 0)
+
+        with open('case.forces', 'w') as out:
+            out.write('  1  1.0  2.0  3.0  4.0  5.0  ******\n')
+        forces.read('case')  # Overflowed field.
+        self.assertEqual(len(forces.block), 0)
+
+    def test_irevs(self):
+        logging.debug('')
+        logging.debug('test_irevs')
+
+        with open('case.forces', 'w') as out:
+            out.write(FORCES_IREVS)
+        forces = Forces()
+        forces.read('case')
+        self.assertEqual(list(forces.block), [1, 2])
+        self.assertEqual(list(forces.fx), [1.0, 1.5])
+        self.assertEqual(list(forces.mx), [-1250., 0.])
+        self.assertEqual(list(forces.rpm), [-12000., 0.])
+        self.assertEqual(list(forces.power), [2856., 0.])
+
+        forces.read('missing')
+        self.assertEqual(len(forces.rpm), 0)
+
+
+if __name__ == '__main__':
+    sys.argv.append('--cover-package=adpac_wrapper.')
+    sys.argv.append('--cover-erase')
+    nose.runmodule()
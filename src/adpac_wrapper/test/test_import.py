@@ -0,0 +1,62 @@
+import logging
+import subprocess
+import sys
+import unittest
+
+import nose
+
+from adpac_wrapper.boundata import lookup, _MODULES
+
+# Imports `adpac_wrapper` in a fresh interpreter and reports import time,
+# whether the default reference Input has been created, and which of
+# `LAZY` have been imported.
+SCRIPT = """\
+import sys
+import time
+start = time.time()
+import adpac_wrapper
+elapsed = time.time() - start
+from adpac_wrapper import boundata
+sys.stdout.write('%%f\\n' %% elapsed)
+sys.stdout.write('%%s\\n' %% (boundata._INPUT is not None))
+sys.stdout.write(' '.join([name for name in %r if name in sys.modules]))
+"""
+
+# Modules which should only be imported when needed: all BC modules,
+# restart/visualization support, and the OpenMDAO domain package.
+LAZY = tuple(sorted(set(['adpac_wrapper.'+module
+                         for module in _MODULES.values()]))) + \
+       ('adpac_wrapper.comm_model', 'adpac_wrapper.restart',
+        'adpac_wrapper.vis3d', 'openmdao.lib.datatypes.domain')
+
+
+class TestCase(unittest.TestCase):
+    """ Test package import overhead. """
+
+    def test_import(self):
+        logging.debug('')
+        logging.debug('test_import')
+
+        proc = subprocess.Popen([sys.executable, '-c', SCRIPT % (LAZY,)],
+                                stdout=subprocess.PIPE)
+        output = proc.communicate()[0].decode().split('\n')
+        self.assertEqual(proc.returncode, 0)
+        logging.debug('    import adpac_wrapper: %s sec', output[0])
+        self.assertEqual(output[1], 'False')  # No default Input.
+        self.assertEqual(output[2], '')       # None of LAZY imported.
+        self.assertTrue(len(LAZY) > 20)
+
+    def test_lookup(self):
+        logging.debug('')
+        logging.debug('test_lookup')
+
+        self.assertEqual(lookup('SSVI').__name__, 'SSVI')
+        self.assertEqual(lookup('INL2DT').__name__, 'InletT')
+        self.assertEqual(lookup('PATCH').__name__, 'BC')
+        self.assertEqual(lookup('NOTABC'), None)
+
+
+if __name__ == '__main__':
+    sys.argv.append('--cover-package=adpac_wrapper.')
+    sys.argv.append('--cover-erase')
+    nose.runmodule()
@@ -6,13 +6,30 @@ import sys
 import unittest
 
 import nose
+import numpy
 
 from openmdao.main.api import set_as_top
 
 from adpac_wrapper import ADPAC
+from adpac_wrapper.input import Input, InputPatch
 
 ORIG_DIR = os.getcwd()
 
+SAMPLE = """\
+# Sample input
+
+ CFL      = -3.5            # comment
+ FNCMAX   = 200
+ F1EQ     = 1.
+ FDEBUG(3) = 1
+ RPM(1)   = 1000.
+ RPM(3)   = -2000
+ NBLD(2)  = 36
+ # embedded comment
+ ENDINPUT
+ CFMAX = 2.0
+"""
+
 
 class TestCase(unittest.TestCase):
     """ Test basic functionality of ADPAC input file parser/generator. """
@@ -69,6 +86,176 @@ class TestCase(unittest.TestCase):
         logging.debug('test_all_bcs')
         self.parse_and_generate('all-bcs')
 
+    def test_read(self):
+        logging.debug('')
+        logging.debug('test_read')
+
+        with open('read-test.input', 'w') as out:
+            out.write(SAMPLE)
+        try:
+            inp = Input()
+            inp.read('read-test')
+        finally:
+            os.remove('read-test.input')
+
+        self.assertEqual(inp.header_lines, ['# Sample input\n', '\n'])
+        self.assertEqual(inp.cfl, -3.5)
+        self.assertEqual(inp.fncmax, 200)
+        self.assertEqual(inp.f1eq, True)
+        self.assertEqual(inp.fdebug_3, True)
+        self.assertEqual(list(inp.rpm), [1000., 0., -2000.])
+        self.assertEqual(list(inp.nbld), [1, 36, 1])
+        self.assertEqual(inp.cfmax, 2.5)  # After ENDINPUT.
+
+        # Written values read back identically, with or without defaults.
+        for write_defaults in (False, True):
+            inp.write_defaults = write_defaults
+            inp.write('read-test')
+            try:
+                with open('read-test.input', 'r') as stream:
+                    text = stream.read()
+                inp2 = Input()
+                inp2.read('read-test')
+            finally:
+                os.remove('read-test.input')
+            self.assertTrue('FDEBUG(3)  = 1.0 ' in text)
+            self.assertEqual(('FDEBUG(1)  = 0.0 ' in text), write_defaults)
+            self.assertEqual(inp2.fdebug_3, True)
+            self.assertEqual(inp2.cfl, -3.5)
+            self.assertEqual(list(inp2.rpm), [1000., 0., -2000.])
+            self.assertEqual(list(inp2.nbld), [1, 36, 1])
+
+        # End of input with trailing text.
+        for eof in ('#EOF   ', ' #EOF end of file', 'ENDINPUT  '):
+            with open('read-test.input', 'w') as out:
+                out.write(' CFL = 1\n%s\n CFMAX = 2.0\n junk line\n' % eof)
+            try:
+                inp.read('read-test')
+            finally:
+                os.remove('read-test.input')
+            self.assertEqual(inp.cfl, 1.)
+            self.assertEqual(inp.cfmax, 2.5)
+
+        with open('read-test.input', 'w') as out:
+            out.write(' CFL = 1\n NOTAVAR = 2\n junk line\n')
+        try:
+            self.assertRaises(RuntimeError, inp.read, 'read-test')
+        finally:
+            os.remove('read-test.input')
+
+    def test_per_block(self):
+        logging.debug('')
+        logging.debug('test_per_block')
+
+        inp = Input()
+        inp.set_per_block('rpm', [100., 200.])
+        self.assertEqual(list(inp.rpm), [100., 200.])
+        self.assertEqual(list(inp.nbld), [1, 1])
+
+        inp.set_per_block('rpm', -300., [1, 4])
+        self.assertEqual(list(inp.rpm), [-300., 200., 0., -300.])
+        self.assertEqual(list(inp.get_per_block('rpm', [2, 4])), [200., -300.])
+        self.assertEqual(inp.get_per_block('rpm', 2), 200.)
+        self.assertEqual(len(inp.bffile), 4)
+
+        inp.set_per_block('nbld', 36, 3)
+        inp.set_per_block('bffile', 'foo.bf', [2])
+        self.assertEqual(list(inp.get_per_block('nbld')), [1, 1, 36, 1])
+        self.assertEqual(inp.get_per_block('bffile', [1, 2]),
+                         ['default_file_name', 'foo.bf'])
+
+        inp.write('per-block')
+        try:
+            with open('per-block.input', 'r') as stream:
+                text = stream.read()
+            inp.rpm[1] = 0.  # In-place modification.
+            inp.write('per-block')
+            with open('per-block.input', 'r') as stream:
+                text2 = stream.read()
+        finally:
+            os.remove('per-block.input')
+        self.assertTrue('RPM(2)     = 200.0' in text)
+        self.assertTrue('NBLD(3)    = 36.0' in text)
+        self.assertTrue('BFFILE(2)  = foo.bf' in text)
+        self.assertFalse('RPM(3)' in text)
+        self.assertFalse('RPM(2)' in text2)
+
+        self.assertRaises(ValueError, inp.set_per_block, 'cfl', [1.])
+        self.assertRaises(ValueError, inp.set_per_block, 'rpm', 1., 0)
+        self.assertRaises(ValueError, inp.set_per_block, 'rpm', [1., 2.],
+                          [1, 2, 3])
+        self.assertRaises(ValueError, inp.get_per_block, 'rpm', 5)
+
+        # Assigning a whole array sets the number of blocks.
+        inp.nbld = numpy.array([10, 20, 30, 40, 50])
+        self.assertEqual(list(inp.rpm), [-300., 0., 0., -300., 0.])
+        self.assertEqual(len(inp.bffile), 5)
+        inp.rpm = numpy.array([1., 2.])
+        self.assertEqual(list(inp.nbld), [10, 20])
+        self.assertEqual(inp.bffile, ['default_file_name', 'foo.bf'])
+        self.assertEqual(inp.diff(Input()).nblocks, 0)
+        inp.write('per-block')
+        try:
+            with open('per-block.input', 'r') as stream:
+                text = stream.read()
+        finally:
+            os.remove('per-block.input')
+        self.assertTrue('NBLD(2)    = 20.0' in text)
+        self.assertFalse('NBLD(3)' in text)
+
+    def test_diff(self):
+        logging.debug('')
+        logging.debug('test_diff')
+
+        base = Input()
+        base.set_per_block('rpm', [100., 200., 300.])
+        base.set_per_block('lofile', 'loss.dat', 3)
+
+        other = Input()
+        other.apply(base.diff(other))  # Nothing to do.
+        self.assertEqual(len(other.diff(Input())), 0)
+
+        other.apply(other.diff(base))
+        self.assertEqual(len(other.diff(base)), 0)
+        self.assertEqual(list(other.rpm), [100., 200., 300.])
+        self.assertEqual(other.lofile[2], 'loss.dat')
+
+        other.cfl = -2.
+        other.casename = 'other'
+        other.fdebug_3 = True
+        other.header_lines = ['# other\n']
+        other.rpm[1] = -200.  # In-place modification.
+        other.set_per_block('nbld', 36, 2)
+        other.set_per_block('bffile', 'foo.bf', 1)
+        patch = base.diff(other)
+        self.assertTrue(isinstance(patch, InputPatch))
+        self.assertEqual(patch.names(), ['bffile', 'casename', 'cfl',
+                                         'fdebug_3', 'header_lines',
+                                         'nbld', 'rpm'])
+        self.assertEqual(len(patch), 7)
+        self.assertEqual(patch.scalars['cfl'], -2.)
+        self.assertEqual(patch.per_block['rpm'][0], [2])
+        self.assertEqual(list(patch.per_block['rpm'][1]), [-200.])
+        self.assertEqual(patch.nblocks, None)
+
+        base.apply(patch)
+        self.assertEqual(len(base.diff(other)), 0)
+
+        # Change in number of blocks.
+        other.set_per_block('rpm', 400., 5)
+        patch = base.diff(other)
+        self.assertEqual(patch.nblocks, 5)
+        self.assertEqual(patch.per_block['rpm'][0], [5])
+        base.apply(patch)
+        self.assertEqual(len(base.rpm), 5)
+        self.assertEqual(len(base.diff(other)), 0)
+
+        patch = base.diff(Input())
+        self.assertEqual(patch.nblocks, 0)
+        base.apply(patch)
+        self.assertEqual(len(base.rpm), 0)
+        self.assertEqual(len(base.lofile), 0)
+
     def test_eee_frontend(self):
         raise nose.SkipTest('Waiting for public data')
         logging.debug('')
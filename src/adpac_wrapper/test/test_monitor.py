@@ -0,0 +1,128 @@
+import logging
+import os.path
+import sys
+import tempfile
+import shutil
+import time
+import unittest
+
+import nose
+
+from adpac_wrapper.monitor import CallbackTask, FileWatcher, MonitorTask, \
+                                  OutputWatchdog, RunMonitor
+from adpac_wrapper.scan import ERRORS
+
+
+class Counter(MonitorTask):
+    """ Counts calls. """
+
+    def __init__(self):
+        self.started = 0
+        self.polled = 0
+        self.finished = 0
+
+    def start(self):
+        self.started += 1
+
+    def poll(self):
+        self.polled += 1
+
+    def finish(self):
+        self.finished += 1
+
+
+class TestCase(unittest.TestCase):
+    """ Test run monitoring support. """
+
+    def setUp(self):
+        """ Called before each test in this class. """
+        self.directory = tempfile.mkdtemp()
+        self.logger = logging.getLogger('test_monitor')
+
+    def tearDown(self):
+        """ Called after each test in this class. """
+        shutil.rmtree(self.directory)
+
+    def test_monitor(self):
+        logging.debug('')
+        logging.debug('test_monitor')
+
+        counter = Counter()
+        monitor = RunMonitor([counter], 0.01, self.logger)
+        monitor.start()
+        time.sleep(0.1)
+        monitor.stop()
+        self.assertEqual(counter.started, 1)
+        self.assertTrue(counter.polled > 0)
+        self.assertEqual(counter.finished, 1)
+
+        # Callbacks, with and without a final call.
+        calls = []
+        tasks = [CallbackTask(lambda: calls.append('final')),
+                 CallbackTask(lambda: calls.append('poll'), final=False)]
+        monitor = RunMonitor(tasks, 10., self.logger)
+        monitor.start()
+        monitor.stop()
+        self.assertEqual(calls, ['final'])
+
+    def test_watcher(self):
+        logging.debug('')
+        logging.debug('test_watcher')
+
+        versions = []
+        path = os.path.join(self.directory, 'watched')
+        watcher = FileWatcher(path, lambda: versions.append(1), self.logger)
+        watcher.start()
+
+        watcher.poll()  # Doesn't exist yet.
+        self.assertEqual(versions, [])
+
+        with open(path, 'w') as out:
+            out.write('version 1\n')
+        watcher.poll()  # Not stable yet.
+        self.assertEqual(versions, [])
+        watcher.poll()
+        self.assertEqual(len(versions), 1)
+        watcher.poll()  # Unchanged.
+        self.assertEqual(len(versions), 1)
+
+        with open(path, 'w') as out:
+            out.write('version 2, longer\n')
+        watcher.poll()
+        watcher.poll()
+        self.assertEqual(len(versions), 2)
+        self.assertEqual(watcher.count, 2)
+
+    def test_watchdog(self):
+        logging.debug('')
+        logging.debug('test_watchdog')
+
+        results = []
+        path = os.path.join(self.directory, 'case.output')
+        watchdog = OutputWatchdog([path], ERRORS, results.append, self.logger)
+        watchdog.start()
+
+        watchdog.poll()  # Doesn't exist yet.
+        with open(path, 'w') as out:
+            out.write(' iteration 1\n ALE')
+        watchdog.poll()  # Partial line.
+        self.assertEqual(results, [])
+
+        with open(path, 'a') as out:
+            out.write('RT! bad\n iteration 2\n')
+        watchdog.poll()
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0].lines['ALERT!'], [(path, 2)])
+
+        with open(path, 'a') as out:
+            out.write(' ABORT in ERROR\n')
+        watchdog.poll()  # Only reported once.
+        self.assertEqual(len(results), 1)
+        self.assertTrue(watchdog.triggered)
+
+
+
+if __name__ == '__main__':
+    sys.argv.append('--cover-package=adpac_wrapper.')
+    sys.argv.append('--cover-erase')
+    nose.runmodule()
@@ -0,0 +1,103 @@
+import logging
+import os.path
+import shutil
+import sys
+import tempfile
+import unittest
+
+import numpy
+import nose
+
+from adpac_wrapper.input import Input
+from adpac_wrapper.results_db import ResultsDB, case_hash, input_parameters
+
+ORIG_DIR = os.getcwd()
+
+
+class TestCase(unittest.TestCase):
+    """ Test results database. """
+
+    def setUp(self):
+        """ Called before each test in this class. """
+        self.directory = tempfile.mkdtemp()
+        os.chdir(self.directory)
+
+    def tearDown(self):
+        """ Called after each test in this class. """
+        os.chdir(ORIG_DIR)
+        shutil.rmtree(self.directory)
+
+    def test_db(self):
+        logging.debug('')
+        logging.debug('test_db')
+
+        with open('case.input', 'w') as out:
+            out.write('FNCMAX = 100\n')
+        digest = case_hash(['case.input'])
+        self.assertEqual(len(digest), 40)
+
+        db = ResultsDB('results.db')
+        for fncmax in (100, 200):
+            run_id = db.record(digest, 'case',
+                               {'fncmax': fncmax, 'cfl': -5., 'f1eq': False},
+                               {'rms_error': numpy.array([-1., -2., -3.]),
+                                'iteration': numpy.array([1, 2, 3])},
+                               [('mass_flow', 10, 1.5),
+                                ('mass_flow', None, 1.6)],
+                               3, 'normal')
+        db.close()
+
+        db = ResultsDB('results.db')
+        try:
+            runs = db.runs(case_hash=digest)
+            self.assertEqual([run['id'] for run in runs], [1, 2])
+            self.assertEqual(runs[0]['iterations'], 3)
+            self.assertEqual(db.runs(casename='other'), [])
+
+            self.assertEqual(db.find(fncmax=200), [run_id])
+            self.assertEqual(db.find(cfl=-5., f1eq=False), [1, 2])
+            self.assertEqual(db.parameters(1)['fncmax'], 100)
+
+            iteration = db.array(run_id, 'iteration')
+            self.assertEqual(list(iteration), [1, 2, 3])
+            self.assertEqual(iteration.dtype, numpy.array([1]).dtype)
+            self.assertEqual(list(db.array(run_id, 'rms_error')),
+                             [-1., -2., -3.])
+            self.assertRaises(KeyError, db.array, run_id, 'missing')
+
+            self.assertEqual(db.probes('mass_flow', run_id),
+                             [(run_id, 10, 1.5), (run_id, None, 1.6)])
+            self.assertEqual(len(db.probes('mass_flow')), 4)
+        finally:
+            db.close()
+
+    def test_input_parameters(self):
+        logging.debug('')
+        logging.debug('test_input_parameters')
+
+        with open('case.input', 'w') as out:
+            out.write('CFL = -3.5\nRPM(1) = 1000.\nRPM(2) = -2000.\n'
+                      'BFFILE(2) = foo.bf\n')
+        inp = Input()
+        inp.read('case')
+        parameters = input_parameters(inp)
+        self.assertEqual(parameters['rpm(1)'], 1000.)
+        self.assertEqual(parameters['rpm(2)'], -2000.)
+        self.assertEqual(parameters['bffile(2)'], 'foo.bf')
+        self.assertEqual(parameters['cfl'], -3.5)
+        self.assertFalse('rpm' in parameters)
+        self.assertFalse('header_lines' in parameters)
+
+        db = ResultsDB('results.db')
+        try:
+            run_id = db.record(case_hash(['case.input']), 'case', parameters)
+            self.assertEqual(db.find(**{'rpm(2)': -2000.}), [run_id])
+            self.assertEqual(db.parameters(run_id)['rpm(1)'], 1000.)
+        finally:
+            db.close()
+
+
+if __name__ == '__main__':
+    sys.argv.append('--cover-package=adpac_wrapper.')
+    sys.argv.append('--cover-erase')
+    nose.runmodule()
@@ -0,0 +1,71 @@
+import logging
+import os.path
+import shutil
+import sys
+import tempfile
+import unittest
+
+import nose
+
+from adpac_wrapper.scan import ERRORS, NO_CONTEXTS, Scanner, scan
+
+ORIG_DIR = os.getcwd()
+
+OUTPUT = """\
+ ADPAC output
+ WARNING in Checkout! something odd
+ iteration 1
+ ABORT in ERROR ALERT! really bad
+ ALERT! bad
+ iteration 2
+ WARNING in Checkout! something else
+ execution normally terminated
+"""
+
+
+class TestCase(unittest.TestCase):
+    """ Test output scanning. """
+
+    def setUp(self):
+        """ Called before each test in this class. """
+        self.directory = tempfile.mkdtemp()
+        os.chdir(self.directory)
+
+    def tearDown(self):
+        """ Called after each test in this class. """
+        os.chdir(ORIG_DIR)
+        shutil.rmtree(self.directory)
+
+    def test_scan(self):
+        logging.debug('')
+        logging.debug('test_scan')
+
+        with open('case.output', 'w') as out:
+            out.write(OUTPUT)
+        with open('case.log', 'w') as out:
+            out.write(' WARNING in Checkout! from log\n')
+        open('empty.log', 'w').close()
+
+        result = scan(['case.output', 'case.log', 'empty.log', 'missing'])
+        self.assertEqual(result.filenames,
+                         ['case.output', 'case.log', 'empty.log'])
+        self.assertEqual(result.missing, ['missing'])
+        self.assertEqual(result.warnings, 3)
+        self.assertEqual(result.count(ERRORS, 'case.output'), 2)
+        self.assertEqual(result.lines['ALERT!'],
+                         [('case.output', 4), ('case.output', 5)])
+        self.assertEqual(result.lines['WARNING in Checkout!'],
+                         [('case.output', 2), ('case.output', 7),
+                          ('case.log', 1)])
+        self.assertTrue(result.normal_termination)
+        self.assertEqual(result.count(NO_CONTEXTS), 0)
+
+        result = Scanner(['iteration']).scan('case.output')
+        self.assertEqual(result.lines['iteration'],
+                         [('case.output', 3), ('case.output', 6)])
+
+
+if __name__ == '__main__':
+    sys.argv.append('--cover-package=adpac_wrapper.')
+    sys.argv.append('--cover-erase')
+    nose.runmodule()
@@ -1,8 +1,11 @@
+import errno
 import logging
 import os.path
 import pkg_resources
 import shutil
 import sys
+import tempfile
+import time
 import unittest
 
 import nose
@@ -10,9 +13,23 @@ import nose
 from openmdao.main.api import set_as_top
 
 from adpac_wrapper import ADPAC
+from adpac_wrapper.stopping import ResidualStall
 
 ORIG_DIR = os.getcwd()
 
+# Stands in for ADPAC: reports an error, then waits to be terminated.
+FAKE_ADPAC = """\
+#!%s
+import os
+import sys
+import time
+with open('adpac.pid', 'w') as out:
+    out.write('%%d\\n' %% os.getpid())
+sys.stdout.write(' ALERT! fake error\\n')
+sys.stdout.flush()
+time.sleep(60)
+""" % sys.executable
+
 
 class TestCase(unittest.TestCase):
     """
@@ -141,6 +158,69 @@ class TestCase(unittest.TestCase):
             if os.path.exists(cmdfile):
                 os.remove(cmdfile)
 
+    def test_stop_file(self):
+        logging.debug('')
+        logging.debug('test_stop_file')
+
+        self.adpac.read_input('all-bcs')
+        self.adpac.check_config()
+
+        self.adpac.stop_policy = ResidualStall()
+        try:
+            self.adpac.check_config()
+        except ValueError as exc:
+            self.assertTrue('stop_file must be set' in str(exc))
+        else:
+            self.fail('Expected ValueError')
+
+        self.adpac.icheck = False  # Terminated at checkpoint instead.
+        self.adpac.check_config()
+
+        self.adpac.icheck = True
+        self.adpac.stop_file = 'adpac.stop'
+        self.adpac.check_config()
+
+    def test_watchdog(self):
+        logging.debug('')
+        logging.debug('test_watchdog')
+
+        directory = tempfile.mkdtemp()
+        try:
+            for suffix in ('.input', '.boundata'):
+                shutil.copy('all-bcs'+suffix, directory)
+            os.chdir(directory)
+            with open('fake_adpac', 'w') as out:
+                out.write(FAKE_ADPAC)
+            os.chmod('fake_adpac', 0755)
+
+            self.adpac.read_input('all-bcs')
+            self.adpac.serial_adpac = os.path.join(directory, 'fake_adpac')
+            self.adpac.poll_delay = 0.1
+            self.adpac.watchdog = True
+            try:
+                self.adpac.run()
+            except RuntimeError as exc:
+                self.assertTrue('1 errors reported by ADPAC' in str(exc))
+            else:
+                self.fail('Expected RuntimeError')
+
+            # The ADPAC process has been terminated (allow time for it
+            # to be reaped).
+            with open('adpac.pid', 'r') as inp:
+                pid = int(inp.read())
+            for retry in range(50):
+                try:
+                    os.kill(pid, 0)
+                except OSError as exc:
+                    self.assertEqual(exc.errno, errno.ESRCH)
+                    break
+                time.sleep(0.1)
+            else:
+                self.fail('ADPAC process %d still exists' % pid)
+        finally:
+            os.chdir(TestCase.directory)
+            shutil.rmtree(directory)
+
     def test_converge(self):
         raise nose.SkipTest('Waiting for public data')
         logging.debug('')
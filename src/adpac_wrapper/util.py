@@ -0,0 +1,59 @@
+"""
+File writing utilities.
+"""
+
+import os
+import tempfile
+
+# Process umask, applied to files created by :func:`atomic_write`.
+_UMASK = None
+
+
+def _umask():
+    """
+    Return process umask, read on first use. The umask can only be read by
+    setting it, so it is briefly set to a restrictive value.
+    """
+    global _UMASK
+    if _UMASK is None:
+        _UMASK = os.umask(0077)
+        os.umask(_UMASK)
+    return _UMASK
+
+
+def atomic_write(path, data, binary=False):
+    """
+    Write `data` to `path` via a temporary file in the same directory which
+    is then renamed, so readers never see a partially written file.
+    """
+    directory, name = os.path.split(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.'+name, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb' if binary else 'w') as out:
+            out.write(data)
+        os.chmod(tmp, 0666 & ~_umask())
+        if os.name == 'nt' and os.path.exists(path):
+            os.remove(path)  # Windows rename won't replace.
+        os.rename(tmp, path)
+    except Exception:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def write_if_changed(path, text):
+    """
+    Write `text` to `path` (see :func:`atomic_write`) unless `path` already
+    contains `text`. Returns True if `path` was written.
+    """
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        pass
+    else:
+        if size == len(text):
+            with open(path, 'r') as inp:
+                if inp.read() == text:
+                    return False
+    atomic_write(path, text)
+    return True
@@ -4,21 +4,23 @@ import time
 from openmdao.main.api import FileMetadata, set_as_top
 from openmdao.main.resource import ResourceAllocationManager as RAM
 from openmdao.lib.components.external_code import ExternalCode
-from openmdao.lib.datatypes.api import Bool, Int, Float, Str
-from openmdao.lib.datatypes.domain import mesh_probe
+from openmdao.lib.datatypes.api import Bool, Int, Float, List, Str
 
 from adpac_wrapper.boundata import Boundata
+from adpac_wrapper.cache    import ParseCache
 from adpac_wrapper.converge import Converge
+from adpac_wrapper.forces   import Forces
 from adpac_wrapper.input    import Input
+from adpac_wrapper.monitor  import CallbackTask, FileWatcher, \
+                                   OutputWatchdog, RunMonitor
 from adpac_wrapper.property import Property
-from adpac_wrapper.vis3d    import Vis3D, Plot3D, BladeRow
-from adpac_wrapper          import restart
+from adpac_wrapper.results_db import ResultsDB, case_hash, \
+                                      input_parameters
+from adpac_wrapper          import scan
 
-# Import boundary conditions so they're all registered.
-from adpac_wrapper import bc, bcint1, bcintm, bcprm, bcprr, bdatin, \
-                          endtta, exitg, fixed, free, inleta, inletg, \
-                          inletm, inletr, inlett, kill, lamss, mbcavg, \
-                          ssvi, system, vce
+# Boundary condition modules are imported as needed by Boundata, and the
+# restart/visualization support (which requires openmdao.lib.datatypes.domain)
+# is imported on first use.
 
 
 class ProbeRequest(object):
@@ -47,6 +49,21 @@ class ADPAC(ExternalCode):
     File-based wrapper for ADPAC.
     Additional information regarding ADPAC may be found in the
     `ADPAC v1.0 User's Manual`.
+
+    `stop_policy` may be set to a :class:`StopPolicy` which is checked as
+    convergence data is written. When it triggers, ADPAC is stopped early:
+    if `icheck` is True `stop_file` is created for ADPAC's stopchk(),
+    otherwise ADPAC is terminated once its next checkpoint is written.
+
+    Monitoring while ADPAC runs (`live_converge`, `probe_checkpoints`,
+    `stop_policy`, and `watchdog`) is performed by a separate thread polling
+    every `poll_delay` seconds. That thread updates `converge`,
+    `probe_history`, and `stop_reason` (and calls `stop_policy`), so trait
+    callbacks on them run in that thread. Other threads should not access
+    them until :meth:`execute` returns. To stop ADPAC early that thread
+    calls :meth:`stop`, which only terminates the ADPAC process; the
+    resulting error is raised by :meth:`execute` in the calling thread.
+    Monitoring is off by default.
     """
 
     update_restart = Bool(False, io_type='in',
@@ -70,6 +87,33 @@ class ADPAC(ExternalCode):
     results_dir = Str(iotype='in',
                       desc='Directory of precomputed results'
                            ' (for workflow debug).')
+    live_converge = Bool(False, iotype='in',
+                         desc='If True, convergence data is updated while'
+                              ' ADPAC runs (by a separate thread).')
+    probe_checkpoints = Bool(False, iotype='in',
+                             desc='If True, surface probes are evaluated on'
+                                  ' each checkpoint written while ADPAC runs.')
+    watchdog = Bool(False, iotype='in',
+                    desc='If True, ADPAC output is monitored while ADPAC'
+                         ' runs (by a separate thread) and ADPAC is'
+                         ' terminated on the first error.')
+
+    stop_file = Str(iotype='in',
+                    desc='File checked by ADPAC stopchk() (see `icheck`).'
+                         ' Required if `stop_policy` is set and `icheck`'
+                         ' is True.')
+    cache_dir = Str(iotype='in',
+                    desc='If set, directory used to cache parsed .input and'
+                         ' .boundata files (see :class:`ParseCache`).')
+    results_db = Str(iotype='in',
+                     desc='If set, path to a results database (see'
+                          ' :class:`ResultsDB`) each run is recorded in.')
+
+    probe_history = List(iotype='out',
+                         desc='(ncyc, {attribute: value}) for each checkpoint'
+                              ' evaluated (see `probe_checkpoints`).')
+    stop_reason = Str(iotype='out',
+                      desc='Why `stop_policy` stopped ADPAC early.')
 
     # Command-line arguments.
     iasync = Bool(False, iotype='in',
@@ -87,10 +131,14 @@ class ADPAC(ExternalCode):
         super(ADPAC, self).__init__()
         self.poll_delay = 1.  # Default is very short.
         self.mesh_probes = []
+        self.stop_policy = None
+        self._terminated = False
+        self._watchdog_errors = 0
 
         self.add('input', Input())
         self.add('boundata', Boundata())
         self.add('converge', Converge())
+        self.add('forces', Forces())
 
         if casename:
             self.input.casename = casename
@@ -186,10 +234,27 @@ class ADPAC(ExternalCode):
         super(ADPAC, self).copy_results(results_dir, patterns)
 
     def check_config(self):
-        """ Check sanity of current configuration. """
+        """
+        Check sanity of current configuration. Errors in the input and in
+        all boundary conditions are logged and reported together.
+        """
         super(ADPAC, self).check_config()
-        self.input.check_config()
-        self.boundata.check_config()
+        errors = []
+        try:
+            self.input.check_config()
+        except ValueError as exc:
+            errors.append(str(exc))
+        errors.extend(self.boundata.config_errors())
+        if self.stop_policy is not None and self.icheck and \
+           not self.stop_file:
+            errors.append('stop_file must be set when stop_policy is set'
+                          ' and icheck is True')
+        if errors:
+            for error in errors:
+                self._logger.error(error)
+            self.raise_exception('%d configuration errors:\n    %s'
+                                 % (len(errors), '\n    '.join(errors)),
+                                 ValueError)
 
     def execute(self):
         """
@@ -217,7 +282,14 @@ class ADPAC(ExternalCode):
         for name in ('fort.42', 'fort.60'):
             if os.path.exists(name):
                 os.remove(name)
+        if self.stop_policy is not None and os.path.exists(self.stop_file):
+            os.remove(self.stop_file)
         self.converge.clear()
+        self.forces.clear()
+        self.probe_history = []
+        self.stop_reason = ''
+        self._terminated = False
+        self._watchdog_errors = 0
 
         if self.run_adpac:
             if self.parallel:
@@ -226,32 +298,25 @@ class ADPAC(ExternalCode):
                 self.run_serial()
 
             # Check for warnings.
-            warnings = 0
             filenames = [casename+'.output']
             if self.parallel:
                 filenames.append(casename+'.log')
-            for fname in filenames:
-                with open(fname) as inp:
-                    for line in inp:
-                        if 'WARNING in Checkout!' in line:
-                            warnings += 1
+            result = scan.scan(filenames)
+            warnings = result.warnings
             if warnings:
                 self._logger.warning('%d warnings written by ADPAC to %s',
                                      warnings, filenames)
             # Check for errors.
-            run_ok = False
-            errors = 0
-            with open(casename+'.output') as inp:
-                for line in inp:
-                    if 'ABORT in ERROR' in line or \
-                       'ALERT!' in line:
-                        errors += 1
-                    elif 'execution normally terminated' in line:
-                        run_ok = True
+            output = casename+'.output'
+            if output in result.missing:
+                self.raise_exception('ADPAC output %s not found' % output,
+                                     RuntimeError)
+            errors = result.count(scan.ERRORS, output)
+            run_ok = result.count(scan.NORMAL_TERMINATION, output) > 0
             if errors:
                 self.raise_exception('%d errors reported by ADPAC' % errors,
                                      RuntimeError)
-            if not run_ok:
+            if not run_ok and not self._terminated:
                 self.raise_exception('truncated ADPAC output', RuntimeError)
 
         else:
@@ -265,6 +330,8 @@ class ADPAC(ExternalCode):
 
         self.read_output()
         self.evaluate_probe_requests()
+        if self.results_db:
+            self.record_results(self.results_db)
 
     def run_serial(self):
         """
@@ -287,7 +354,7 @@ class ADPAC(ExternalCode):
         self.stdin  = self.input.casename+'.input'
         self.stdout = self.input.casename+'.output'
         self.stderr = ExternalCode.STDOUT
-        super(ADPAC, self).execute()
+        self._execute_monitored()
 
     def run_parallel(self):
         """
@@ -302,14 +369,11 @@ class ADPAC(ExternalCode):
             try:
                 self._run_parallel(busy_hosts)
             except RuntimeError:
-                with open(self.input.casename+'.log') as out:
-                    for line in out.readlines():
-                        msg = 'No free InfiniPath contexts available'
-                        if msg in line:
-                            self._logger.error(msg)
-                            break
-                    else:
-                        raise
+                result = scan.scan(self.input.casename+'.log')
+                if result.count(scan.NO_CONTEXTS):
+                    self._logger.error(scan.NO_CONTEXTS)
+                else:
+                    raise
             else:
                 return
         self.raise_exception('Too many retries.', RuntimeError)
@@ -375,7 +439,7 @@ class ADPAC(ExternalCode):
         self.stdout = self.input.casename+'.log'
         self.stderr = ExternalCode.STDOUT
         self.resources = {}  # MPI will do distribution.
-        super(ADPAC, self).execute()
+        self._execute_monitored()
 
         # On some systems (like GX with a shared filesystem between
         # front-end and compute nodes) it can take a bit before the
@@ -390,6 +454,88 @@ class ADPAC(ExternalCode):
             self.raise_exception('timeout waiting for output files',
                                  RuntimeError)
 
+    def _execute_monitored(self):
+        """
+        Run the external code. If any monitoring has been requested, a
+        :class:`RunMonitor` polls the monitoring tasks (every `poll_delay`
+        seconds) while ADPAC runs.
+        """
+        casename = self.input.casename
+        restart_new = casename+'.restart.new'
+
+        tasks = []
+        if self.watchdog:
+            filenames = [casename+'.output']
+            if self.parallel:
+                filenames.append(casename+'.log')
+            tasks.append(OutputWatchdog(filenames, scan.ERRORS,
+                                        self._error_detected, self._logger))
+        if self.live_converge or self.stop_policy is not None:
+            tasks.append(CallbackTask(self._update_converge))
+        if self.probe_checkpoints and self.mesh_probes:
+            tasks.append(FileWatcher(restart_new, self._evaluate_probes,
+                                     self._logger))
+        if self.stop_policy is not None:
+            # Only while running, not once ADPAC has exited.
+            tasks.append(CallbackTask(self._check_stop_policy, final=False))
+            if not self.icheck:
+                tasks.append(FileWatcher(restart_new, self._checkpoint_written,
+                                         self._logger))
+        if not tasks:
+            super(ADPAC, self).execute()
+            return
+
+        monitor = RunMonitor(tasks, self.poll_delay, self._logger)
+        monitor.start()
+        try:
+            super(ADPAC, self).execute()
+        except RuntimeError:
+            if self._watchdog_errors:
+                self._stop = False
+                self.raise_exception('%d errors reported by ADPAC'
+                                     % self._watchdog_errors, RuntimeError)
+            if not self._terminated:
+                raise
+            self._stop = False
+            self._logger.info('ADPAC terminated: %s', self.stop_reason)
+        finally:
+            monitor.stop()
+            if self.stop_reason and os.path.exists(self.stop_file):
+                os.remove(self.stop_file)
+
+    def _check_stop_policy(self):
+        """
+        If `stop_policy` says to stop, either create `stop_file` or arrange
+        for termination at the next checkpoint.
+        """
+        if self.stop_reason:
+            return  # Already stopping.
+        reason = self.stop_policy.check(self.converge)
+        if not reason:
+            return
+        self.stop_reason = reason
+        if self.icheck:
+            self._logger.info('stopping ADPAC via %r: %s',
+                              self.stop_file, reason)
+            with open(self.stop_file, 'w') as out:
+                out.write('%s\n' % reason)
+        else:
+            self._logger.info('stopping ADPAC at next checkpoint: %s', reason)
+
+    def _error_detected(self, result):
+        """ Terminate ADPAC due to errors found by watchdog. """
+        for pattern in scan.ERRORS:
+            for filename, line in result.lines[pattern]:
+                self._logger.error('%s: line %d: %s', filename, line, pattern)
+        self._watchdog_errors = result.errors
+        self.stop()
+
+    def _checkpoint_written(self):
+        """ Terminate ADPAC if stopping and a checkpoint has been written. """
+        if self.stop_reason and not self._terminated:
+            self._terminated = True
+            self.stop()
+
     def read_input(self, casename=None):
         """
         Read from ``<casename>.input`` and ``<casename>.boundata`` files.
@@ -397,9 +543,14 @@ class ADPAC(ExternalCode):
         casename = casename or self.input.casename
         self.external_files = []
 
+        if self.cache_dir:
+            cache = ParseCache(os.path.abspath(self.cache_dir))
+        else:
+            cache = None
+
         with self.dir_context:
-            self.input.read(casename)
-            self.boundata.read(casename, self.input)
+            self.input.read(casename, cache)
+            self.boundata.read(casename, self.input, cache)
 
             self.external_files.extend((
                 FileMetadata(path='%s.input' % casename, input=True,
@@ -441,16 +592,38 @@ class ADPAC(ExternalCode):
             self.boundata.write(casename, self.input)
 
     def read_output(self, casename=None):
-        """ Read convergence output. """
+        """
+        Read convergence and forces output. Only convergence data written
+        since the last read is processed (see :meth:`Converge.update`).
+        """
         casename = casename or self.input.casename
         with self.dir_context:
-            self.converge.clear()
             if os.path.exists(casename+'.converge'):
-                self.converge.read(casename)
+                self.converge.update(casename)
+            self.forces.read(casename)
+
+    def _update_converge(self):
+        """ Read convergence output written so far by a running ADPAC. """
+        if os.path.exists(self.input.casename+'.converge'):
+            self.converge.update(self.input.casename)
 
     def evaluate_probe_requests(self):
         """ Evaluates all surface probe requests. """
+        for attr, value in self._evaluate_probes():
+            setattr(self, attr, value)
+
+    def _evaluate_probes(self):
+        """
+        Returns ``(attribute, value)`` for each surface probe variable,
+        evaluated on the current ``<casename>.restart.new``.
+        If `probe_checkpoints` is True, the values are also recorded in
+        `probe_history`.
+        """
+        from openmdao.lib.datatypes.domain import mesh_probe
+        from adpac_wrapper import restart
+
         domain = restart.read(self.input.casename, self._logger)
+        values = []
         for req in self.mesh_probes:
             surfaces = []
             for block, imin, imax, jmin, jmax, kmin, kmax in req.surfaces:
@@ -468,7 +641,47 @@ class ADPAC(ExternalCode):
 
             metrics = mesh_probe(domain, surfaces, variables, req.scheme)
             for i, (attr, metric, units) in enumerate(req.variables):
-                setattr(self, attr, metrics[i])
+                values.append((attr, metrics[i]))
+
+        if self.probe_checkpoints and values:
+            ncyc = domain.zones[0].flow_solution.ncyc
+            if not self.probe_history or self.probe_history[-1][0] != ncyc:
+                self.probe_history.append((ncyc, dict(values)))
+                self._logger.debug('probes at ncyc %d: %s', ncyc, values)
+        return values
+
+    def record_results(self, path):
+        """
+        Record inputs, convergence data, and probe values in the
+        :class:`ResultsDB` at `path`. Returns the run id.
+        """
+        casename = self.input.casename
+        with self.dir_context:
+            digest = case_hash([casename+'.input', casename+'.boundata'])
+
+        parameters = input_parameters(self.input)
+
+        probes = []
+        for ncyc, values in self.probe_history:
+            for attr, value in sorted(values.items()):
+                probes.append((attr, ncyc, value))
+        for req in self.mesh_probes:
+            for attr, metric, units in req.variables:
+                probes.append((attr, None, getattr(self, attr)))
+
+        iterations = self.converge.iteration
+        if self.stop_reason:
+            status = 'stopped: %s' % self.stop_reason
+        else:
+            status = 'normal'
+        db = ResultsDB(os.path.abspath(path))
+        try:
+            return db.record(digest, casename, parameters,
+                             self.converge.columns(), probes,
+                             int(iterations[-1]) if len(iterations) else None,
+                             status, self.get_abs_directory())
+        finally:
+            db.close()
 
     def create_bladerow_vis3d(self, npassages=0, rows=None):
         """
@@ -480,11 +693,15 @@ class ADPAC(ExternalCode):
         Returns the created :class:`Vis3D` object.
         Does not always produce a good result.
         """
+        from adpac_wrapper.vis3d import Vis3D, Plot3D, BladeRow
+
         casename = self.input.casename
         nblades = self.input.nbld
         root = Vis3D(Plot3D(casename+'.mesh', casename+'.p3drel',
                             multiblock=True, dim=3, blanking=False,
                             binary=True, big_endian=True, unformatted=False))
+        boundata = self.boundata
+        table = boundata.table()
         row = 0
         for i in range(len(nblades)):
             block = i + 1
@@ -496,23 +713,21 @@ class ADPAC(ExternalCode):
             imax, jmax, kmax = -1, -1, -1
 
             # Find jmax (shroud) surface and get I range.
-            for _bc in self.boundata._bcs:
-                if _bc.type_name == 'SSVI' and _bc.lblock1 == block and \
-                   _bc.lface1 == 'J' and _bc.ldir1 == 'M':
-                    imin = _bc.m1lim1
-                    imax = _bc.m1lim2
-                    break
+            found = boundata.find('SSVI', block, 'J', 'M')
+            if found:
+                bc_row = table[found[0]]
+                imin = int(bc_row['m1lim1'])
+                imax = int(bc_row['m1lim2'])
             else:
                 msg = "Can't find shroud surface in block %d" % block
                 self._logger.debug(msg)
 
             # Find jmin (hub) surface and get I range.
-            for _bc in self.boundata._bcs:
-                if _bc.type_name == 'SSVI' and _bc.lblock1 == block and \
-                   _bc.lface1 == 'J' and _bc.ldir1 == 'P':
-                    imin = _bc.m1lim1  # Not always 1 (i.e. spinner)
-                    imax = _bc.m1lim2
-                    break
+            found = boundata.find('SSVI', block, 'J', 'P')
+            if found:
+                bc_row = table[found[0]]
+                imin = int(bc_row['m1lim1'])  # Not always 1 (i.e. spinner)
+                imax = int(bc_row['m1lim2'])
             else:
                 msg = "Can't find hub surface in block %d" % block
                 self._logger.debug(msg)
@@ -521,15 +736,14 @@ class ADPAC(ExternalCode):
                 continue  # No I range.
 
             # Find kmax (blade) surface to get leading and trailing edges.
-            for _bc in self.boundata._bcs:
-                if _bc.type_name == 'SSVI' and _bc.lblock1 == block and \
-                   _bc.lface1 == 'K' and _bc.ldir1 == 'M':
-                    ile  = _bc.m1lim1
-                    ite  = _bc.m1lim2
-                    jmin = _bc.n1lim1
-                    jmax = _bc.n1lim2
-                    kmax = _bc.l2lim
-                    break
+            found = boundata.find('SSVI', block, 'K', 'M')
+            if found:
+                bc_row = table[found[0]]
+                ile  = int(bc_row['m1lim1'])
+                ite  = int(bc_row['m1lim2'])
+                jmin = int(bc_row['n1lim1'])
+                jmax = int(bc_row['n1lim2'])
+                kmax = int(bc_row['l2lim'])
             else:
                 msg = "Can't find blade surface in block %d" % block
                 self._logger.debug(msg)